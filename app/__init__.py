@@ -25,13 +25,46 @@ def create_app() -> Flask:
     migrate.init_app(app, db)
     jwt.init_app(app)
 
+    # Before anything imports NumPy, Torch, TensorFlow or OpenCV
+    from .threads import thread_budget
+
+    thread_budget.init_app(app)
+
+    from .admission import admission
+    from .overload import overload
+    from .timing import stage_timer
+    from .metrics import metrics
+    from .query_stats import query_stats
+
+    admission.init_app(app)
+    overload.init_app(app)
+    stage_timer.init_app(app)
+    metrics.init_app(app)
+    query_stats.init_app(app)
+
     from .auth import auth_bp
     from .routes import bp as routes_bp
     from .admin import admin_bp
+    from .stream import stream_bp
 
     app.register_blueprint(routes_bp)
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(admin_bp, url_prefix="/admin")
+    app.register_blueprint(stream_bp, url_prefix="/stream")
+
+    from .cli import register_commands
+
+    register_commands(app)
+
+    if app.config["WARM_UP_MODELS"]:
+        from .services.predict import warm_up
+
+        warm_up()
+
+    if app.config["MODEL_WATCH_INTERVAL"] > 0:
+        from .services.predict import get_registry
+
+        get_registry().watch(app.config["MODEL_WATCH_INTERVAL"])
 
     @app.errorhandler(400)
     def bad_request(error):
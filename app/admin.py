@@ -5,11 +5,26 @@ from functools import wraps
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 
 from . import db
+from .admission import admission
 from .insights import generate_ocean_insights
 from .models import Detection, User
+from .overload import overload
 from .schemas import DetectionSchema, UserSchema
+from .services.arena import arena
+from .services.predict import (
+    BACKEND,
+    CHUNK_SIZE,
+    CONFIGURED_TIERS,
+    DEFAULT_TIER,
+    HOST_PROFILE,
+    cascade_stats,
+    get_registry,
+)
+from .threads import thread_budget
+from .timing import stage_timer
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -58,10 +73,18 @@ def get_all_users():
     query = query.order_by(User.created_at.desc())
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
+    # One grouped count for the page instead of a count query per user
+    counts = dict(
+        db.session.query(Detection.user_id, func.count(Detection.id))
+        .filter(Detection.user_id.in_([user.id for user in pagination.items]))
+        .group_by(Detection.user_id)
+        .all()
+    )
+
     users_data = []
     for user in pagination.items:
         user_dict = user_schema.dump(user)
-        user_dict["detection_count"] = Detection.query.filter_by(user_id=user.id).count()
+        user_dict["detection_count"] = counts.get(user.id, 0)
         user_dict["is_admin"] = user.is_admin()
         user_dict["role"] = user.role
         users_data.append(user_dict)
@@ -204,7 +227,8 @@ def get_all_detections():
     if search:
         query = query.filter(Detection.name.ilike(f"%{search}%"))
 
-    query = query.order_by(Detection.created_at.desc())
+    # Load each detection's user in the same query
+    query = query.options(joinedload(Detection.user)).order_by(Detection.created_at.desc())
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
     detections_data = []
@@ -220,7 +244,7 @@ def get_all_detections():
         results_data = {key: det_dict.pop(key) for key in ocean_keys if key in det_dict}
         det_dict["results"] = results_data
 
-        user = User.query.get(detection.user_id)
+        user = detection.user
         if user:
             det_dict["user"] = {
                 "id": user.id,
@@ -450,6 +474,58 @@ def get_timeline_statistics():
     return jsonify({"days": days, "timeline": timeline_data}), 200
 
 
+@admin_bp.route("/models", methods=["GET"])
+@jwt_required()
+@admin_required
+def get_model_status():
+    return jsonify(
+        {
+            "default_tier": DEFAULT_TIER,
+            "tiers": get_registry().stats(),
+            "cache": get_registry().cache_stats(),
+            "cascade": cascade_stats(),
+            "overload": overload.stats(),
+            "admission": admission.stats(),
+            "threads": thread_budget.effective(),
+            "arena": arena.stats(),
+            "backend": {"name": BACKEND, "chunk_size": CHUNK_SIZE, "tuned": bool(HOST_PROFILE)},
+        }
+    ), 200
+
+
+@admin_bp.route("/metrics", methods=["GET"])
+@jwt_required()
+@admin_required
+def get_metrics():
+    """Per-stage request latency histograms (see ``timing``)."""
+    return jsonify({"stages": stage_timer.stats()}), 200
+
+
+@admin_bp.route("/models/reload", methods=["POST"])
+@jwt_required()
+@admin_required
+def reload_models():
+    """Hot-swap tiers to their current artifact version without a restart."""
+    data = request.get_json(silent=True) or {}
+    tier = data.get("tier")
+    force = bool(data.get("force", False))
+
+    if tier is not None and tier not in CONFIGURED_TIERS:
+        return jsonify(
+            {"error": f"Invalid tier. Must be one of: {', '.join(CONFIGURED_TIERS)}"}
+        ), 400
+
+    registry = get_registry()
+    results = {}
+    for name in [tier] if tier else CONFIGURED_TIERS:
+        try:
+            results[name] = registry.reload(name, force=force)
+        except Exception as e:
+            return jsonify({"error": f"Failed to reload '{name}': {e}", "reloaded": results}), 500
+
+    return jsonify({"reloaded": results}), 200
+
+
 @admin_bp.route("/check", methods=["GET"])
 @jwt_required()
 def check_admin_status():
@@ -0,0 +1,178 @@
+"""
+Admission control for /predict and live stream chunks.
+
+Each request reserves a slot before its body is read, so a burst of uploads
+is turned away on headers alone once a user is at their concurrency limit or
+the queue is full. After upload, the video is priced by a cost estimate
+(duration and resolution) and waits in a bounded FIFO queue until enough
+inference capacity is free.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+
+from flask import Flask
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted."""
+
+    def __init__(self, message: str, status: int = 429, retry_after: int = 5):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+@dataclass(eq=False)
+class Ticket:
+    user_id: int
+    cost: float = 0.0
+    running: bool = False
+
+
+class AdmissionController:
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._waiting: deque = deque()
+        self._reserved = 0
+        self._running_cost = 0.0
+        self._running = 0
+        self._per_user: Counter = Counter()
+
+        self.capacity = 4.0
+        self.max_queue = 16
+        self.per_user_limit = 2
+        self.queue_timeout = 30.0
+        self.decode_weight = 0.25
+        self.duration_weight = 0.05
+
+    def init_app(self, app: Flask) -> None:
+        self.capacity = app.config["ADMISSION_CAPACITY"]
+        self.max_queue = app.config["ADMISSION_MAX_QUEUE"]
+        self.per_user_limit = app.config["ADMISSION_PER_USER"]
+        self.queue_timeout = app.config["ADMISSION_QUEUE_TIMEOUT"]
+        self.decode_weight = app.config["ADMISSION_DECODE_WEIGHT"]
+        self.duration_weight = app.config["ADMISSION_DURATION_WEIGHT"]
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests holding a slot that are not running yet."""
+        return self._reserved - self._running
+
+    def estimate_cost(self, video: dict, num_frames: int, tta: bool = False) -> float:
+        """
+        Price one request in inference units.
+
+        One unit is a 10-frame backbone + head pass, so backbone cost scales
+        with the frames sampled. Decoding adds cost per sampled frame in
+        proportion to its megapixels (relative to 1080p), and seeking adds a
+        little per minute of video.
+
+        Args:
+            video: Metadata from ``routes.probe_video``.
+            num_frames: Frames that will be decoded.
+            tta: Flip TTA doubles the backbone batch.
+
+        Returns:
+            Estimated cost in inference units.
+        """
+        megapixels = video["width"] * video["height"] / (1920 * 1080)
+        minutes = video["duration"] / 60
+        return (
+            num_frames / 10 * (2 if tta else 1)
+            + num_frames * megapixels * self.decode_weight
+            + minutes * self.duration_weight
+        )
+
+    def reserve(self, user_id: int) -> Ticket:
+        """
+        Reserve a queue slot for ``user_id`` using request headers only.
+
+        Raises:
+            AdmissionRejected: If the user is at their limit or the queue is full.
+        """
+        with self._cond:
+            if self._per_user[user_id] >= self.per_user_limit:
+                raise AdmissionRejected(
+                    f"Too many concurrent predictions (limit {self.per_user_limit})",
+                    retry_after=self._retry_after(),
+                )
+            if self.queue_depth >= self.max_queue:
+                raise AdmissionRejected("Prediction queue is full", retry_after=self._retry_after())
+
+            self._per_user[user_id] += 1
+            self._reserved += 1
+            return Ticket(user_id=user_id)
+
+    def start(self, ticket: Ticket, cost: float) -> None:
+        """
+        Wait in FIFO order until ``cost`` fits in the free capacity.
+
+        A request larger than the whole capacity runs alone.
+
+        Raises:
+            AdmissionRejected: If the wait exceeds the queue timeout.
+        """
+        deadline = time.monotonic() + self.queue_timeout
+
+        with self._cond:
+            ticket.cost = cost
+            self._waiting.append(ticket)
+
+            while not (
+                self._waiting[0] is ticket
+                and (self._running == 0 or self._running_cost + cost <= self.capacity)
+            ):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self._cond.notify_all()
+                    raise AdmissionRejected(
+                        "Timed out waiting for inference capacity",
+                        status=503,
+                        retry_after=self._retry_after(),
+                    )
+                self._cond.wait(remaining)
+
+            self._waiting.popleft()
+            ticket.running = True
+            self._running += 1
+            self._running_cost += cost
+            self._cond.notify_all()
+
+    def release(self, ticket: Ticket) -> None:
+        """Release the slot and any capacity held by ``ticket``."""
+        with self._cond:
+            if ticket.running:
+                ticket.running = False
+                self._running -= 1
+                self._running_cost -= ticket.cost
+            elif ticket in self._waiting:
+                self._waiting.remove(ticket)
+
+            self._reserved -= 1
+            self._per_user[ticket.user_id] -= 1
+            if self._per_user[ticket.user_id] <= 0:
+                del self._per_user[ticket.user_id]
+            self._cond.notify_all()
+
+    def _retry_after(self) -> int:
+        return max(1, int(self.queue_timeout / 2))
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "running": self._running,
+                "running_cost": round(self._running_cost, 2),
+                "capacity": self.capacity,
+                "queued": self.queue_depth,
+                "waiting": len(self._waiting),
+                "max_queue": self.max_queue,
+                "users": len(self._per_user),
+            }
+
+
+admission = AdmissionController()
@@ -0,0 +1,457 @@
+"""
+Flask CLI commands for model maintenance.
+
+Heavy ML imports happen inside each command so the web app does not pay for
+them at startup.
+"""
+
+import click
+from flask import Flask
+
+
+def _maintenance_backbone(tier: str):
+    """
+    Build a tier's backbone in eager PyTorch for pruning and analysis.
+
+    The host profile's backend would hand back a compiled or ONNX Runtime
+    body that the model surgery cannot see into.
+
+    Raises:
+        click.ClickException: If the tier is a variant (e.g. int8), whose
+            quantized layers cannot be pruned or factorized.
+    """
+    from .services.predict import create_backbone, split_tier
+
+    base, variant = split_tier(tier)
+    if variant:
+        raise click.ClickException(f"Use the base tier '{base}' instead of the '{variant}' variant")
+    return create_backbone(tier, backend="eager")
+
+
+def register_commands(app: Flask) -> None:
+    """Register model maintenance commands on ``app.cli``."""
+
+    @app.cli.command("distill")
+    @click.option("--data-dir", required=True, help="Folder of per-video face crops.")
+    @click.option("--epochs", default=10, show_default=True, type=int)
+    @click.option("--batch-size", default=32, show_default=True, type=int)
+    @click.option("--lr", default=1e-3, show_default=True, type=float)
+    @click.option("--holdout", default=0.1, show_default=True, type=float,
+                  help="Fraction of clips kept out of training for the report.")
+    @click.option("--output", default=None, help="Student checkpoint path.")
+    def distill(data_dir, epochs, batch_size, lr, holdout, output):
+        """Distill the deeper PolyFace backbone into the shallow one."""
+        from .services.distill import (
+            compare_models,
+            distill_student,
+            format_report,
+            load_face_clips,
+            save_student,
+            save_teacher,
+        )
+        from .services.polyfacemodels2 import create_model_polyface1
+        from .services.predict import (
+            STUDENT_PATH,
+            TEACHER_PATH,
+            build_head,
+            get_backbone,
+            get_model,
+            load_teacher,
+        )
+
+        model = get_model()
+        device = next(get_backbone(model).parameters()).device
+        # Plain deeper backbone, so the weights saved below load into the
+        # deeper tier whatever pruning or quantization it is served with
+        teacher = load_teacher().to(device).eval()
+        student = create_model_polyface1().to(device)
+
+        clips = load_face_clips(data_dir)
+        n_eval = max(1, int(len(clips) * holdout))
+        if n_eval < len(clips):
+            train_clips, eval_clips = clips[:-n_eval], clips[-n_eval:]
+        else:
+            train_clips, eval_clips = clips, clips
+        frames = train_clips.reshape(-1, *train_clips.shape[2:])
+        click.echo(f"Training on {len(train_clips)} clips, reporting on {len(eval_clips)}")
+
+        distill_student(teacher, student, frames, epochs=epochs, batch_size=batch_size, lr=lr)
+        save_student(student, output or STUDENT_PATH)
+        save_teacher(teacher, TEACHER_PATH)
+
+        report = compare_models(teacher, student, build_head(model), eval_clips)
+        click.echo(format_report(report))
+
+    @app.cli.command("bench-tta")
+    @click.option("--tier", default=None, help="Model tier to benchmark.")
+    @click.option("--clips", default=1, show_default=True, type=int)
+    @click.option("--runs", default=5, show_default=True, type=int)
+    def bench_tta(tier, clips, runs):
+        """Measure the added backbone cost of flip TTA."""
+        from .services.benchmark import bench_tta as run, format_timings
+        from .services.predict import DEFAULT_TIER, get_backbone, get_model
+
+        result = run(get_backbone(get_model(tier or DEFAULT_TIER)), clips=clips, runs=runs)
+        click.echo(f"{result['frames']} frames per call")
+        click.echo(format_timings({"plain": result["plain"], "tta (orig + flip)": result["tta"]}))
+        click.echo(f"TTA cost: {result['ratio']:.2f}x")
+
+    @app.cli.command("factorize-fc")
+    @click.option("--tier", default=None, help="Model tier whose backbone is analysed.")
+    @click.option("--ranks", default="16,32,64,128,256", show_default=True)
+    @click.option("--data-dir", default=None,
+                  help="Face crops to measure on (random frames if omitted).")
+    @click.option("--frames", default=64, show_default=True, type=int)
+    def factorize_fc(tier, ranks, data_dir, frames):
+        """Report embedding fidelity of a low-rank FC layer per rank."""
+        from torch import nn
+
+        from .services.benchmark import random_frames
+        from .services.distill import load_face_clips
+        from .services.lowrank import format_rank_report, rank_report
+        from .services.predict import DEFAULT_TIER
+
+        backbone = _maintenance_backbone(tier or DEFAULT_TIER)
+        if not isinstance(backbone.backbone.fc.fc, nn.Linear):
+            raise click.ClickException("Unset OCEAN_FC_RANK to analyse the full-rank FC layer")
+
+        if data_dir:
+            clips = load_face_clips(data_dir)
+            inputs = (clips.reshape(-1, *clips.shape[2:])[:frames]).astype("float32") / 255.0
+        else:
+            inputs = random_frames(frames)
+
+        rows = rank_report(backbone, inputs, [int(r) for r in ranks.split(",")])
+        click.echo(format_rank_report(rows))
+
+    @app.cli.command("prune")
+    @click.option("--tier", default=None, help="Model tier whose backbone is pruned.")
+    @click.option("--ratio", default=0.4, show_default=True, type=float,
+                  help="Fraction of branch channels removed per conv.")
+    @click.option("--criterion", default="bn", show_default=True,
+                  type=click.Choice(["bn", "activation"]))
+    @click.option("--data-dir", default=None,
+                  help="Face crops for calibration, fine-tuning and the report.")
+    @click.option("--epochs", default=0, show_default=True, type=int,
+                  help="Fine-tuning epochs against the unpruned backbone (needs --data-dir).")
+    @click.option("--output", default=None, help="Pruned artifact path.")
+    def prune(tier, ratio, criterion, data_dir, epochs, output):
+        """Prune branch channels of the PolyFace blocks and report quality drift."""
+        import json
+        import os
+
+        from .services.benchmark import random_frames
+        from .services.distill import (
+            compare_models,
+            distill_student,
+            format_report,
+            load_face_clips,
+        )
+        from .services.predict import (
+            DEFAULT_TIER,
+            FC_RANK,
+            NUM_FRAMES,
+            PRUNED_DIR,
+            USE_PRUNED,
+            build_head,
+            get_model,
+        )
+        from .services.prune import clone_backbone, count_flops, prune_model, save_pruned
+
+        if USE_PRUNED or FC_RANK > 0:
+            raise click.ClickException(
+                "Unset OCEAN_PRUNED and OCEAN_FC_RANK to prune the original backbone"
+            )
+        if epochs and not data_dir:
+            raise click.ClickException("Fine-tuning needs --data-dir")
+
+        tier = tier or DEFAULT_TIER
+        teacher = _maintenance_backbone(tier)
+        student = clone_backbone(teacher)
+
+        if data_dir:
+            clips = load_face_clips(data_dir)
+        else:
+            clips = (random_frames(4 * NUM_FRAMES) * 255).astype("uint8")
+            clips = clips.reshape(4, NUM_FRAMES, *clips.shape[1:])
+        frames = clips.reshape(-1, *clips.shape[2:])
+
+        spec = prune_model(student, ratio, criterion, frames[:64].astype("float32") / 255.0)
+        flops_before, flops_after = count_flops(teacher), count_flops(student)
+        click.echo(
+            f"FLOPs per frame: {flops_before / 1e9:.2f}G -> {flops_after / 1e9:.2f}G "
+            f"({1 - flops_after / flops_before:.1%} fewer)"
+        )
+
+        if epochs:
+            distill_student(teacher, student, frames, epochs=epochs)
+
+        output = output or os.path.join(PRUNED_DIR, f"{tier}.pt")
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        save_pruned(student, spec, tier, output)
+        with open(os.path.splitext(output)[0] + ".json", "w") as f:
+            json.dump({"tier": tier, "ratio": ratio, "criterion": criterion, **spec}, f, indent=2)
+
+        report = compare_models(teacher, student, build_head(get_model(tier)), clips)
+        click.echo(format_report(report))
+
+    @app.cli.command("adapt-resolution")
+    @click.option("--tier", default=None, help="Model tier whose backbone is adapted.")
+    @click.option("--size", default=112, show_default=True, type=int,
+                  help="Native backbone input size.")
+    @click.option("--data-dir", required=True, help="Face crops for fine-tuning and the report.")
+    @click.option("--epochs", default=5, show_default=True, type=int)
+    @click.option("--holdout", default=0.1, show_default=True, type=float)
+    @click.option("--output", default=None, help="Adapted backbone path.")
+    def adapt_resolution(tier, size, data_dir, epochs, holdout, output):
+        """Run a backbone natively below 235x235 and fine-tune its pooled FC layer."""
+        import os
+
+        from .services.distill import (
+            compare_models,
+            distill_student,
+            format_report,
+            load_face_clips,
+        )
+        from .services.predict import (
+            DEFAULT_TIER,
+            FC_RANK,
+            INPUT_MODE,
+            build_head,
+            get_model,
+            resolution_path,
+        )
+        from .services.prune import clone_backbone, count_flops
+        from .services.resolution import adapt_resolution as adapt, save_adapted
+
+        if INPUT_MODE == "native" or FC_RANK > 0:
+            raise click.ClickException(
+                "Unset OCEAN_INPUT_MODE=native and OCEAN_FC_RANK to adapt the original backbone"
+            )
+
+        tier = tier or DEFAULT_TIER
+        teacher = _maintenance_backbone(tier)
+        student = adapt(clone_backbone(teacher), size)
+
+        flops_before, flops_after = count_flops(teacher), count_flops(student)
+        click.echo(
+            f"FLOPs per frame: {flops_before / 1e9:.2f}G -> {flops_after / 1e9:.2f}G "
+            f"({1 - flops_after / flops_before:.1%} fewer)"
+        )
+
+        clips = load_face_clips(data_dir)
+        n_eval = max(1, int(len(clips) * holdout))
+        if n_eval < len(clips):
+            train_clips, eval_clips = clips[:-n_eval], clips[-n_eval:]
+        else:
+            train_clips, eval_clips = clips, clips
+
+        if epochs:
+            frames = train_clips.reshape(-1, *train_clips.shape[2:])
+            distill_student(teacher, student, frames, epochs=epochs)
+
+        output = output or resolution_path(tier, size)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        save_adapted(student, tier, output)
+
+        report = compare_models(teacher, student, build_head(get_model(tier)), eval_clips)
+        click.echo(format_report(report))
+
+    @app.cli.command("bench-precision")
+    @click.option("--tier", default=None, help="Model tier to check.")
+    @click.option("--data-dir", default=None,
+                  help="Face crops to measure on (random frames if omitted).")
+    @click.option("--clips", default=8, show_default=True, type=int)
+    @click.option("--runs", default=3, show_default=True, type=int)
+    def bench_precision(tier, data_dir, clips, runs):
+        """Check bfloat16 parity and speed against FP32 on the same weights."""
+        from .services.benchmark import random_frames
+        from .services.distill import load_face_clips
+        from .services.precision import bf16_supported, format_parity, parity_check
+        from .services.predict import (
+            DEFAULT_TIER,
+            NUM_FRAMES,
+            build_head,
+            build_model,
+            get_backbone,
+            get_model,
+        )
+
+        model = get_model(tier or DEFAULT_TIER)
+        backbone = get_backbone(model)
+        if not bf16_supported(next(backbone.parameters()).device):
+            click.echo("Warning: no native bfloat16 support, timings reflect emulation")
+
+        heads = {}
+        for precision in ("fp32", "bf16"):
+            copy = build_model(backbone, precision)
+            copy.set_weights(model.get_weights())
+            heads[precision] = build_head(copy)
+
+        if data_dir:
+            inputs = load_face_clips(data_dir)[:clips]
+        else:
+            inputs = (random_frames(clips * NUM_FRAMES) * 255).astype("uint8")
+            inputs = inputs.reshape(clips, NUM_FRAMES, *inputs.shape[1:])
+
+        click.echo(format_parity(parity_check(backbone, heads, inputs, runs=runs)))
+
+    @app.cli.command("bench-cascade")
+    @click.option("--data-dir", required=True, help="Folder of per-video face crops.")
+    @click.option("--cheap-tier", default="shallow", show_default=True)
+    @click.option("--full-tier", default="deeper", show_default=True)
+    @click.option("--margin", default=5.0, show_default=True, type=float)
+    @click.option("--max-spread", default=5.0, show_default=True, type=float)
+    @click.option("--samples", default=10, show_default=True, type=int)
+    def bench_cascade(data_dir, cheap_tier, full_tier, margin, max_spread, samples):
+        """Measure cascade escalation rate and level agreement with the full tier."""
+        import time
+
+        from .insights import get_level
+        from .services.distill import load_face_clips
+        from .services.predict import OCEAN_TRAITS, predict_ocean, predict_ocean_cascade
+
+        clips = load_face_clips(data_dir).astype("float32") / 255.0
+        escalated, agree, cascade_s, full_s = 0, 0, 0.0, 0.0
+
+        for clip in clips:
+            start = time.perf_counter()
+            full = predict_ocean(clip, tier=full_tier)
+            full_s += time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = predict_ocean_cascade(
+                clip, cheap_tier, full_tier, margin=margin, max_spread=max_spread, samples=samples
+            )
+            cascade_s += time.perf_counter() - start
+
+            escalated += result["escalated"]
+            agree += sum(
+                get_level(result["scores"][t]) == get_level(full[t]) for t in OCEAN_TRAITS
+            )
+
+        n = len(clips)
+        click.echo(f"Clips: {n}")
+        click.echo(f"Escalated to {full_tier}: {escalated / n:.1%}")
+        click.echo(f"Level agreement with {full_tier}: {agree / (n * len(OCEAN_TRAITS)):.2%}")
+        click.echo(
+            f"Mean latency: full {full_s / n * 1000:.0f} ms, cascade {cascade_s / n * 1000:.0f} ms"
+        )
+
+    @app.cli.command("bench-serving")
+    @click.option("--tier", default=None, help="Model tier to benchmark.")
+    @click.option("--runs", default=50, show_default=True, type=int)
+    def bench_serving(tier, runs):
+        """Measure per-call overhead of Keras predict() against traced serving functions."""
+        from .services.benchmark import bench_serving as run, format_timings
+        from .services.predict import DEFAULT_TIER, get_serving
+
+        serving = get_serving(tier or DEFAULT_TIER)
+        click.echo(format_timings(run(serving.model, serving.head, runs=runs)))
+
+    @app.cli.command("bench-threads")
+    @click.option("--tier", default=None, help="Model tier to benchmark.")
+    @click.option(
+        "--configs",
+        default=None,
+        help="Comma-separated WORKERSxTHREADS pairs. Default: splits of the usable cores "
+        "plus an oversubscribed config.",
+    )
+    @click.option("--runs", default=5, show_default=True, type=int, help="Clips per worker.")
+    def bench_threads(tier, configs, runs):
+        """Sweep worker/thread budgets and report latency and throughput."""
+        import json
+
+        from .services.benchmark import bench_threads as run
+        from .services.predict import DEFAULT_TIER, FRAME_SIZE, get_backbone, get_model
+        from .threads import thread_budget, usable_cores
+
+        if configs:
+            pairs = [tuple(int(v) for v in c.lower().split("x")) for c in configs.split(",")]
+        else:
+            cores = usable_cores()
+            pairs = [(w, max(1, cores // w)) for w in (1, 2, 4) if w <= cores]
+            pairs.append((min(4, cores), cores))
+
+        click.echo(json.dumps(thread_budget.effective(), indent=2))
+        rows = run(get_backbone(get_model(tier or DEFAULT_TIER)), pairs, size=FRAME_SIZE, runs=runs)
+
+        click.echo(f"{'Config':<24} {'p50 ms':>10} {'p95 ms':>10} {'clips/s':>10}")
+        click.echo("-" * 57)
+        for label, t in rows.items():
+            click.echo(
+                f"{label:<24} {t['p50_ms']:>10.2f} {t['p95_ms']:>10.2f} {t['clips_per_s']:>10.2f}"
+            )
+
+    @app.cli.command("tune")
+    @click.option("--tier", default=None, help="Model tier to tune on.")
+    @click.option("--clips", default=4, show_default=True, type=int, help="Clips per timed call.")
+    @click.option("--runs", default=5, show_default=True, type=int)
+    @click.option("--output", default=None, help="Profile path. Default: OCEAN_HOST_PROFILE.")
+    def tune(tier, clips, runs, output):
+        """Benchmark backends, thread counts and chunk sizes and write this host's profile."""
+        from .services.host_profile import PROFILE_PATH, save_profile
+        from .services.predict import DEFAULT_TIER
+        from .services.tune import tune_host
+        from .threads import thread_budget, usable_cores
+
+        # Explore up to the full per-worker split, not a previously tuned count
+        split = max(1, usable_cores() // thread_budget.workers)
+        thread_counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n < split] + [split]
+
+        settings, results = tune_host(
+            tier or DEFAULT_TIER, clips=clips, runs=runs, thread_counts=thread_counts
+        )
+
+        click.echo(f"{'Threads':<24} {'ms':>10}")
+        for n, ms in results["threads"].items():
+            click.echo(f"{n:<24} {ms:>10.1f}")
+        click.echo(f"\n{'Backend':<24} {'ms':>10} {'min cosine':>12}")
+        for backend, r in results["backends"].items():
+            if "error" in r:
+                click.echo(f"{backend:<24} {'n/a':>10}   {r['error'][:60]}")
+            else:
+                click.echo(f"{backend:<24} {r['ms']:>10.1f} {r['min_cosine']:>12.4f}")
+        click.echo(f"\n{'Chunk size':<24} {'ms':>10}")
+        for size, ms in results["chunk_sizes"].items():
+            click.echo(f"{size:<24} {ms:>10.1f}")
+
+        path = output or PROFILE_PATH
+        save_profile(settings, results, path)
+        click.echo(f"\nSelected {settings}; wrote {path}. Restart workers to apply.")
+
+    @app.cli.command("profile-memory")
+    @click.option("--tier", default=None, help="Model tier to profile.")
+    @click.option(
+        "--batch-sizes", default="1,10,32,64", show_default=True, help="Comma-separated batches."
+    )
+    def profile_memory(tier, batch_sizes):
+        """Report peak activation memory per batch size for the default and lean forwards."""
+        from .services.memory import format_memory, profile_memory as run
+        from .services.predict import DEFAULT_TIER, FRAME_SIZE, get_backbone, get_model
+
+        backbone = get_backbone(get_model(tier or DEFAULT_TIER))
+        sizes = [int(b) for b in batch_sizes.split(",")]
+        click.echo(format_memory(run(backbone, sizes, size=FRAME_SIZE)))
+
+    @app.cli.command("profile-blocks")
+    @click.option("--tier", default=None, help="Model tier to profile.")
+    @click.option("--batch", default=10, show_default=True, type=int, help="Frames per forward.")
+    @click.option("--runs", default=10, show_default=True, type=int)
+    @click.option("--top", default=0, type=int, help="Only list the N slowest blocks.")
+    @click.option("--trace", default=None, help="Write a Chrome trace JSON to this path.")
+    def profile_blocks(tier, batch, runs, top, trace):
+        """Profile wall time, FLOPs and output bytes of every backbone block."""
+        from .services.block_profile import (
+            format_block_profile,
+            profile_blocks as run,
+            save_chrome_trace,
+        )
+        from .services.predict import DEFAULT_TIER, FRAME_SIZE, get_backbone, get_model
+
+        backbone = get_backbone(get_model(tier or DEFAULT_TIER))
+        report = run(backbone, batch=batch, size=FRAME_SIZE, runs=runs)
+        click.echo(format_block_profile(report, top=top))
+        if trace:
+            save_chrome_trace(report, trace)
+            click.echo(f"\nChrome trace written to {trace}")
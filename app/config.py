@@ -37,6 +37,42 @@ class Config:
     MODEL_CHECKPOINT_PATH: str = os.path.join(MODEL_DIR, "1127_145313", "polyface.t5")
     MODEL_H5_PATH: str = os.path.join(MODEL_DIR, "keras", "polyface_adagrad.h5")
 
+    # Load every configured tier and trace its serving functions at startup
+    # instead of on the first request
+    WARM_UP_MODELS: bool = os.getenv("WARM_UP_MODELS", "false").lower() in ("1", "true")
+
+    # Poll model artifacts every N seconds and hot-swap changed tiers (0 = off);
+    # POST /admin/models/reload swaps on demand
+    MODEL_WATCH_INTERVAL: float = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+
+    # CPU thread budget: cores are split between THREAD_WORKERS worker processes
+    # (defaults to gunicorn's WEB_CONCURRENCY) and the same per-worker limit is
+    # applied to Torch, TensorFlow, OpenCV and OMP/MKL. THREADS_PER_WORKER > 0
+    # overrides the split.
+    THREAD_WORKERS: int = int(os.getenv("THREAD_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+    THREADS_PER_WORKER: int = int(os.getenv("THREADS_PER_WORKER", "0"))
+    THREAD_INTEROP: int = int(os.getenv("THREAD_INTEROP", "1"))
+
+    # Return per-stage request timings (upload, decode, inference, DB, ...)
+    # in a Server-Timing header
+    SERVER_TIMING: bool = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true")
+
+    # Prometheus metrics. /metrics is only served when METRICS_TOKEN is set and
+    # requires it as a bearer token. Under a pre-fork server also set
+    # PROMETHEUS_MULTIPROC_DIR so all workers are aggregated (see app/metrics.py)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true")
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+
+    # SQL instrumentation: per-request query count and time, slow statement
+    # logging and N+1 detection (one statement shape repeated in a request).
+    # DB_DEBUG_HEADERS adds X-DB-Queries / X-DB-Time-Ms / X-DB-Repeated.
+    DB_INSTRUMENT: bool = os.getenv("DB_INSTRUMENT", "false").lower() in ("1", "true")
+    DB_SLOW_QUERY_MS: float = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+    DB_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+    DB_DEBUG_HEADERS: bool = os.getenv(
+        "DB_DEBUG_HEADERS", "true" if DEBUG else "false"
+    ).lower() in ("1", "true")
+
     # Upload paths
     UPLOAD_FOLDER: str = os.path.join(BASE_DIR, "..", "video")
     STATIC_FOLDER: str = os.path.join(BASE_DIR, "..", "static")
@@ -49,6 +85,65 @@ class Config:
     NUM_FRAMES: int = 10
     FRAME_SIZE: tuple[int, int] = (112, 112)
 
+    # Flip test-time augmentation for every request ("tta=1" enables it per request)
+    TTA_DEFAULT: bool = os.getenv("TTA_DEFAULT", "false").lower() in ("1", "true")
+
+    # Monte-Carlo dropout samples for "uncertainty=1" requests (head-only cost)
+    MC_DROPOUT_SAMPLES: int = int(os.getenv("MC_DROPOUT_SAMPLES", "20"))
+
+    # Cascade: requests for a tier deeper than CASCADE_CHEAP_TIER are scored
+    # by the cheap tier first and only rerun on the requested tier when a
+    # trait is within CASCADE_MARGIN points of a level threshold or its
+    # MC-dropout spread exceeds CASCADE_MAX_SPREAD points
+    CASCADE_ENABLED: bool = os.getenv("CASCADE_ENABLED", "false").lower() in ("1", "true")
+    CASCADE_CHEAP_TIER: str = os.getenv("CASCADE_CHEAP_TIER", "shallow")
+    CASCADE_MARGIN: float = float(os.getenv("CASCADE_MARGIN", "5"))
+    CASCADE_MAX_SPREAD: float = float(os.getenv("CASCADE_MAX_SPREAD", "5"))
+    CASCADE_SAMPLES: int = int(os.getenv("CASCADE_SAMPLES", "10"))
+
+    # Long-video mode ("mode=long" on /predict): one 10-frame window per
+    # LONG_VIDEO_WINDOW_SECONDS of video, windows overlapping by NUM_FRAMES - stride
+    LONG_VIDEO_WINDOW_SECONDS: float = float(os.getenv("LONG_VIDEO_WINDOW_SECONDS", "20"))
+    LONG_VIDEO_MAX_WINDOWS: int = int(os.getenv("LONG_VIDEO_MAX_WINDOWS", "16"))
+    LONG_VIDEO_STRIDE: int = int(os.getenv("LONG_VIDEO_STRIDE", "5"))
+
+    # Live streaming (/stream): rescore every N new frames over the last NUM_FRAMES.
+    # Sessions are kept in process memory, so /stream answers 503 unless the
+    # server runs a single worker (THREAD_WORKERS / WEB_CONCURRENCY = 1).
+    STREAM_UPDATE_EVERY: int = int(os.getenv("STREAM_UPDATE_EVERY", "5"))
+    STREAM_MAX_PER_USER: int = int(os.getenv("STREAM_MAX_PER_USER", "1"))
+    STREAM_IDLE_TIMEOUT: float = float(os.getenv("STREAM_IDLE_TIMEOUT", "60"))
+    STREAM_MAX_FRAMES_PER_CHUNK: int = int(os.getenv("STREAM_MAX_FRAMES_PER_CHUNK", "30"))
+
+    # Model tier per tenant (user email domain), e.g. "acme.com:shallow,corp.id:deep".
+    # Requests may still pick a tier with the "tier" form field.
+    TENANT_MODEL_TIERS: dict[str, str] = dict(
+        item.strip().lower().split(":", 1)
+        for item in os.getenv("TENANT_MODEL_TIERS", "").split(",")
+        if ":" in item
+    )
+
+    # Overload degradation: thresholds for levels 1 (fewer frames), 2 (cheaper tier)
+    # and 3 (reject with 429). A level is entered when either threshold is reached.
+    OVERLOAD_QUEUE_DEPTHS: tuple[int, ...] = tuple(
+        int(v) for v in os.getenv("OVERLOAD_QUEUE_DEPTHS", "4,8,16").split(",")
+    )
+    OVERLOAD_P95_MS: tuple[float, ...] = tuple(
+        float(v) for v in os.getenv("OVERLOAD_P95_MS", "10000,20000,40000").split(",")
+    )
+    OVERLOAD_RECOVERY_RATIO: float = float(os.getenv("OVERLOAD_RECOVERY_RATIO", "0.5"))
+    OVERLOAD_COOLDOWN: float = float(os.getenv("OVERLOAD_COOLDOWN", "10"))
+    OVERLOAD_REDUCED_FRAMES: int = int(os.getenv("OVERLOAD_REDUCED_FRAMES", "5"))
+
+    # Admission control: cost units (one unit ~ one 10-frame inference) that may
+    # run at once, queued requests, and concurrent predictions per user.
+    ADMISSION_CAPACITY: float = float(os.getenv("ADMISSION_CAPACITY", "4"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+    ADMISSION_PER_USER: int = int(os.getenv("ADMISSION_PER_USER", "2"))
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+    ADMISSION_DECODE_WEIGHT: float = float(os.getenv("ADMISSION_DECODE_WEIGHT", "0.25"))
+    ADMISSION_DURATION_WEIGHT: float = float(os.getenv("ADMISSION_DURATION_WEIGHT", "0.05"))
+
 
 OCEAN_TRAITS: list[str] = [
     "Openness",
@@ -10,6 +10,8 @@ Threshold:
 
 from typing import TypedDict
 
+from .services.levels import get_level
+
 
 class InsightResult(TypedDict):
     level: str  # "high", "medium", "low"
@@ -28,21 +30,6 @@ class OceanInsights(TypedDict):
     summary: str
 
 
-# Threshold definitions
-HIGH_THRESHOLD = 60
-MEDIUM_THRESHOLD = 40
-
-
-def get_level(score: float) -> str:
-    """Determine the level based on score threshold."""
-    if score >= HIGH_THRESHOLD:
-        return "high"
-    elif score >= MEDIUM_THRESHOLD:
-        return "medium"
-    else:
-        return "low"
-
-
 # ============================================================================
 # OPENNESS INSIGHTS
 # ============================================================================
@@ -0,0 +1,216 @@
+"""
+Prometheus metrics at /metrics.
+
+Exported series:
+
+- request rate and latency per blueprint and route (``routes``, ``auth``,
+  ``admin``, ``stream``), labelled with the URL rule rather than the path
+- request stage durations observed by ``timing.stage_timer`` (upload,
+  decode, backbone, head, DB, PDF generation, ...)
+- inference queue depth (uploaded requests waiting for capacity) and
+  running requests
+- frames per backbone batch and model load time per tier, observed by the
+  inference code (defined in ``services.telemetry``)
+- process RSS
+- SQLAlchemy pool checkouts, checkout wait and connections in use
+- SQL statements, their latency, slow statements and N+1 patterns per
+  route, with DB_INSTRUMENT (see ``query_stats``)
+
+The endpoint is served only when METRICS_TOKEN is set, to scrapers sending
+it as ``Authorization: Bearer <token>``.
+
+Under a pre-fork server every worker has its own counters. Set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty directory shared by the workers
+(and wipe it on restart): prometheus_client then keeps the values in
+per-process files and /metrics aggregates all workers. Gauges are summed
+over live workers, except RSS which is reported per pid. Call
+``prometheus_client.multiprocess.mark_process_dead(worker.pid)`` from the
+server's child-exit hook so gauges of dead workers are dropped.
+"""
+
+import hmac
+import os
+import resource
+import time
+from functools import wraps
+
+from flask import Flask, Response, abort, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+from .admission import admission
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# Latency bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUESTS = Counter(
+    "ocean_http_requests_total",
+    "HTTP requests handled.",
+    ["blueprint", "route", "method", "status"],
+)
+REQUEST_SECONDS = Histogram(
+    "ocean_http_request_duration_seconds",
+    "HTTP request latency.",
+    ["blueprint", "route", "method"],
+    buckets=BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "ocean_request_stage_duration_seconds",
+    "Time spent in one stage of a request.",
+    ["stage"],
+    buckets=BUCKETS,
+)
+QUEUE_DEPTH = Gauge(
+    "ocean_inference_queue_depth",
+    "Uploaded /predict requests waiting for inference capacity.",
+    multiprocess_mode="livesum",
+)
+RUNNING = Gauge(
+    "ocean_inference_running",
+    "/predict requests running inference.",
+    multiprocess_mode="livesum",
+)
+RSS_BYTES = Gauge(
+    "ocean_process_resident_memory_bytes",
+    "Resident set size of the worker process.",
+    multiprocess_mode="liveall",
+)
+DB_CHECKOUTS = Counter(
+    "ocean_db_pool_checkouts_total",
+    "Connections checked out of the SQLAlchemy pool.",
+)
+DB_CHECKOUT_SECONDS = Histogram(
+    "ocean_db_pool_checkout_seconds",
+    "Time to get a connection from the SQLAlchemy pool, including waiting.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_IN_USE = Gauge(
+    "ocean_db_pool_checked_out",
+    "Connections currently checked out of the SQLAlchemy pool.",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Counter(
+    "ocean_db_queries_total",
+    "SQL statements run by requests.",
+    ["blueprint"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "ocean_db_query_duration_seconds",
+    "SQL statement latency.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+DB_SLOW_QUERIES = Counter(
+    "ocean_db_slow_queries_total",
+    "SQL statements slower than DB_SLOW_QUERY_MS.",
+)
+DB_N_PLUS_ONE = Counter(
+    "ocean_db_n_plus_one_total",
+    "Requests that repeated one statement shape DB_N_PLUS_ONE_THRESHOLD or more times.",
+    ["endpoint"],
+)
+
+
+def rss_bytes() -> int:
+    """Current resident set size, or the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def collector_registry() -> CollectorRegistry:
+    """Registry to read: every worker's values in multiprocess mode, else this process."""
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+class Metrics:
+
+    def __init__(self):
+        self.enabled = True
+        self.token = ""
+        self._pool = None
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = app.config["METRICS_ENABLED"]
+        self.token = app.config["METRICS_TOKEN"]
+        if not self.enabled:
+            return
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        if self.token:
+            app.add_url_rule("/metrics", "metrics", self.export)
+
+        from . import db
+
+        with app.app_context():
+            self._instrument_pool(db.engine.pool)
+
+    def _instrument_pool(self, pool) -> None:
+        self._pool = pool
+        event.listen(pool, "checkout", lambda *args: DB_CHECKOUTS.inc())
+
+        # The pool has no event before a checkout, so time the call itself
+        connect = pool.connect
+
+        @wraps(connect)
+        def timed_connect(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return connect(*args, **kwargs)
+            finally:
+                DB_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+
+        pool.connect = timed_connect
+
+    def _start(self) -> None:
+        g.metrics_started = time.perf_counter()
+
+    def _finish(self, response):
+        if request.endpoint == "metrics" or "metrics_started" not in g:
+            return response
+
+        seconds = time.perf_counter() - g.metrics_started
+        blueprint = request.blueprint or "app"
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUESTS.labels(blueprint, route, request.method, str(response.status_code)).inc()
+        REQUEST_SECONDS.labels(blueprint, route, request.method).observe(seconds)
+        self.sample()
+        return response
+
+    def sample(self) -> None:
+        """Update the gauges of this worker."""
+        stats = admission.stats()
+        # Not stats["queued"], which also counts requests still uploading
+        QUEUE_DEPTH.set(stats["waiting"])
+        RUNNING.set(stats["running"])
+        RSS_BYTES.set(rss_bytes())
+        if self._pool is not None and hasattr(self._pool, "checkedout"):
+            DB_IN_USE.set(self._pool.checkedout())
+
+    def export(self) -> Response:
+        expected = f"Bearer {self.token}".encode()
+        if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), expected):
+            abort(401)
+
+        self.sample()
+        return Response(generate_latest(collector_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+metrics = Metrics()
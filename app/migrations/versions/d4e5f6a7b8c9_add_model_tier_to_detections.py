@@ -0,0 +1,26 @@
+"""Add model_tier to detections table
+
+Revision ID: d4e5f6a7b8c9
+Revises: a2b492848bec
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e5f6a7b8c9'
+down_revision = 'a2b492848bec'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('detections', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('model_tier', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('detections', schema=None) as batch_op:
+        batch_op.drop_column('model_tier')
@@ -39,6 +39,10 @@ class Detection(db.Model):
     agreeableness = db.Column(db.Float, nullable=False)
     neuroticism = db.Column(db.Float, nullable=False)
 
+    model_tier = db.Column(db.String(20), nullable=True)  # "shallow", "deep" or "deeper"
+    degradation_level = db.Column(db.Integer, nullable=True)  # see overload.OverloadController
+    model_version = db.Column(db.String(64), nullable=True)  # predict.artifact_version of the tier
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -0,0 +1,133 @@
+"""
+Overload controller for /predict.
+
+Watches inference queue depth and p95 latency and degrades service step by
+step instead of letting latency grow without bound:
+
+- 0 NORMAL: full frame sampling on the requested tier
+- 1 REDUCED_FRAMES: fewer sampled frames per video
+- 2 CHEAPER_TIER: fewer frames on the cheapest configured tier
+- 3 REJECT: 429 with Retry-After
+
+Escalation is immediate. Recovery goes down one level at a time and only
+after load has stayed below a fraction of the thresholds for a cooldown
+period (hysteresis), so the level does not flap around a threshold.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+from flask import Flask
+
+
+class OverloadController:
+    NORMAL = 0
+    REDUCED_FRAMES = 1
+    CHEAPER_TIER = 2
+    REJECT = 3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latencies: deque = deque(maxlen=1000)
+        self._level = self.NORMAL
+        self._changed_at = 0.0
+
+        self.queue_depths = (4, 8, 16)
+        self.p95_ms = (10000.0, 20000.0, 40000.0)
+        self.recovery_ratio = 0.5
+        self.cooldown = 10.0
+        self.window = 60.0
+        self.reduced_frames = 5
+
+    def init_app(self, app: Flask) -> None:
+        self.queue_depths = tuple(app.config["OVERLOAD_QUEUE_DEPTHS"])
+        self.p95_ms = tuple(app.config["OVERLOAD_P95_MS"])
+        self.recovery_ratio = app.config["OVERLOAD_RECOVERY_RATIO"]
+        self.cooldown = app.config["OVERLOAD_COOLDOWN"]
+        self.reduced_frames = app.config["OVERLOAD_REDUCED_FRAMES"]
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    @property
+    def queue_depth(self) -> int:
+        return self._in_flight
+
+    def p95(self) -> float:
+        """p95 inference latency in milliseconds over the recent window."""
+        with self._lock:
+            return self._p95_locked(time.monotonic())
+
+    def _p95_locked(self, now: float) -> float:
+        while self._latencies and now - self._latencies[0][0] > self.window:
+            self._latencies.popleft()
+        if not self._latencies:
+            return 0.0
+        return float(np.percentile([ms for _, ms in self._latencies], 95))
+
+    def _target_level(self, depth: int, p95: float, ratio: float = 1.0) -> int:
+        level = self.NORMAL
+        for i, (max_depth, max_p95) in enumerate(zip(self.queue_depths, self.p95_ms)):
+            if depth >= max_depth * ratio or p95 >= max_p95 * ratio:
+                level = i + 1
+        return level
+
+    def evaluate(self) -> int:
+        """Update and return the degradation level from current load."""
+        with self._lock:
+            now = time.monotonic()
+            depth = self._in_flight
+            p95 = self._p95_locked(now)
+
+            target = self._target_level(depth, p95)
+            if target > self._level:
+                self._level = target
+                self._changed_at = now
+            elif (
+                self._level > self.NORMAL
+                and now - self._changed_at >= self.cooldown
+                and self._target_level(depth, p95, self.recovery_ratio) < self._level
+            ):
+                self._level -= 1
+                self._changed_at = now
+
+            return self._level
+
+    def num_frames(self, level: int, default: int) -> int:
+        """Number of frames to sample from a video at ``level``."""
+        return min(default, self.reduced_frames) if level >= self.REDUCED_FRAMES else default
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait, estimated from queue depth and p95."""
+        seconds = self.p95() / 1000 * max(self._in_flight, 1)
+        return int(min(max(math.ceil(seconds), 1), 120))
+
+    @contextmanager
+    def track(self):
+        """Count one unit of inference work in the queue and record its latency."""
+        with self._lock:
+            self._in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self._in_flight -= 1
+                self._latencies.append((end, (end - start) * 1000))
+
+    def stats(self) -> dict:
+        return {
+            "level": self._level,
+            "queue_depth": self._in_flight,
+            "p95_ms": round(self.p95(), 2),
+        }
+
+
+overload = OverloadController()
@@ -0,0 +1,116 @@
+"""
+SQL query instrumentation.
+
+SQLAlchemy cursor events count the statements each request runs and the
+time spent in them:
+
+- the total goes into the "sql" stage of ``stage_timer`` (Server-Timing,
+  stage histograms) and into Prometheus counters
+- statements slower than DB_SLOW_QUERY_MS are logged
+- a statement shape (the SQL with its bound parameters, IN lists collapsed)
+  run DB_N_PLUS_ONE_THRESHOLD or more times in one request is logged and
+  counted as an N+1 pattern: usually a lazy load or a query in a loop that
+  should be a join, an eager load or one grouped query
+- with DB_DEBUG_HEADERS, responses carry ``X-DB-Queries``, ``X-DB-Time-Ms``
+  and ``X-DB-Repeated`` (number of N+1 shapes found)
+
+Statements outside a request (CLI, startup) are not tracked.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+
+from flask import Flask, g, has_request_context, request
+from sqlalchemy import event
+
+from .metrics import DB_N_PLUS_ONE, DB_QUERIES, DB_QUERY_SECONDS, DB_SLOW_QUERIES
+from .timing import stage_timer
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"\bIN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL text with whitespace normalized and IN lists collapsed."""
+    return _IN_LIST.sub("IN (...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = 100.0
+        self.repeat_threshold = 5
+        self.debug_headers = False
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = app.config["DB_INSTRUMENT"]
+        if not self.enabled:
+            return
+
+        self.slow_ms = app.config["DB_SLOW_QUERY_MS"]
+        self.repeat_threshold = app.config["DB_N_PLUS_ONE_THRESHOLD"]
+        self.debug_headers = app.config["DB_DEBUG_HEADERS"]
+
+        from . import db
+
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._before)
+            event.listen(db.engine, "after_cursor_execute", self._after)
+        app.after_request(self._finish)
+
+    # The start time lives on the execution context: after_cursor_execute
+    # never fires for a failed statement, and the context goes with it
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        context._query_start = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        seconds = time.perf_counter() - context._query_start
+        if not has_request_context():
+            return
+
+        shapes = g.setdefault("query_shapes", Counter())
+        shapes[statement_shape(statement)] += 1
+        g.query_seconds = g.get("query_seconds", 0.0) + seconds
+        stage_timer.record("sql", seconds)
+        DB_QUERY_SECONDS.observe(seconds)
+
+        if seconds * 1000 >= self.slow_ms:
+            DB_SLOW_QUERIES.inc()
+            logger.warning(
+                f"Slow query ({seconds * 1000:.0f} ms) in {request.endpoint}: "
+                f"{statement_shape(statement)[:500]}"
+            )
+
+    def repeated(self) -> dict[str, int]:
+        """Statement shapes of the current request run at least ``repeat_threshold`` times."""
+        shapes = g.get("query_shapes", Counter()) if has_request_context() else Counter()
+        return {shape: n for shape, n in shapes.items() if n >= self.repeat_threshold}
+
+    def _finish(self, response):
+        shapes = g.get("query_shapes")
+        if not shapes:
+            return response
+
+        count = sum(shapes.values())
+        DB_QUERIES.labels(request.blueprint or "app").inc(count)
+
+        repeated = self.repeated()
+        if repeated:
+            DB_N_PLUS_ONE.labels(request.endpoint or "unmatched").inc()
+        for shape, n in repeated.items():
+            logger.warning(f"N+1 in {request.endpoint}: {n}x {shape[:500]}")
+
+        if self.debug_headers:
+            response.headers["X-DB-Queries"] = str(count)
+            response.headers["X-DB-Time-Ms"] = f"{g.query_seconds * 1000:.1f}"
+            if repeated:
+                response.headers["X-DB-Repeated"] = str(len(repeated))
+        return response
+
+
+query_stats = QueryStats()
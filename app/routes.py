@@ -1,83 +1,281 @@
 import os
+import time
 
 import cv2
 import numpy as np
-from flask import Blueprint, Response, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
 
 from . import db
+from .admission import AdmissionRejected, admission
 from .insights import generate_ocean_insights, get_insight_for_detection
 from .models import Detection, User
+from .overload import OverloadController, overload
 from .pdf_generator import generate_pdf_report
 from .schemas import DetectionSchema
-from .services.predict import predict_ocean
+from .timing import stage_timer
+from .services.predict import (
+    CONFIGURED_TIERS,
+    DEFAULT_TIER,
+    FRAME_SIZE,
+    cheapest_tier,
+    get_registry,
+    is_cheaper,
+    predict_ocean,
+    predict_ocean_cascade,
+    predict_ocean_reduced,
+    predict_ocean_uncertainty,
+    predict_ocean_windows,
+)
 
 detection_schema = DetectionSchema()
 
 bp = Blueprint("routes", __name__)
 
 
-def extract_frames(video_path, num_frames=10, target_size=(112, 112)):
-    cap = cv2.VideoCapture(video_path)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-    if total_frames < num_frames:
-        frame_indices = list(range(total_frames)) * (num_frames // total_frames + 1)
-        frame_indices = frame_indices[:num_frames]
-    else:
-        frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
-
+def read_frames(cap, frame_indices, target_size=(112, 112)):
     frames = []
+    seek = decode = resize = 0.0
 
     for idx in frame_indices:
+        start = time.perf_counter()
         cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        seeked = time.perf_counter()
         ret, frame = cap.read()
 
         if not ret:
             frame = np.zeros((target_size[1], target_size[0], 3), dtype=np.uint8)
 
         frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        decoded = time.perf_counter()
         frame = cv2.resize(frame, target_size)
 
         frames.append(frame)
+        seek += seeked - start
+        decode += decoded - seeked
+        resize += time.perf_counter() - decoded
 
-    cap.release()
+    stage_timer.record("extract_seek", seek)
+    stage_timer.record("extract_decode", decode)
+    stage_timer.record("extract_resize", resize)
     return np.array(frames, dtype=np.uint8)
 
 
+def open_video(video_path):
+    with stage_timer.span("extract_open"):
+        cap = cv2.VideoCapture(video_path)
+        return cap, int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+
+def extract_frames(video_path, num_frames=10, target_size=(112, 112)):
+    cap, total_frames = open_video(video_path)
+
+    if total_frames < num_frames:
+        frame_indices = list(range(total_frames)) * (num_frames // total_frames + 1)
+        frame_indices = frame_indices[:num_frames]
+    else:
+        frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
+
+    frames = read_frames(cap, frame_indices, target_size)
+    cap.release()
+    return frames
+
+
+def extract_windows(video_path, num_windows, num_frames=10, stride=5, target_size=(112, 112)):
+    """
+    Sample ``num_windows`` windows of ``num_frames`` frames spread over the video.
+
+    Windows sit on one evenly spaced frame grid and advance by ``stride``
+    grid steps, so overlapping windows share frames. Each distinct frame is
+    decoded once.
+
+    Returns:
+        Tuple of distinct frames (N, H, W, 3) and window indices into them
+        (num_windows, num_frames).
+    """
+    cap, total_frames = open_video(video_path)
+
+    grid_size = (num_windows - 1) * stride + num_frames
+    grid = np.linspace(0, max(total_frames - 1, 0), grid_size, dtype=int)
+    frame_indices, inverse = np.unique(grid, return_inverse=True)
+
+    windows = inverse[np.arange(num_windows)[:, None] * stride + np.arange(num_frames)]
+
+    frames = read_frames(cap, frame_indices, target_size)
+    cap.release()
+    return frames, windows
+
+
+def resolve_model_tier(user_id, requested=None):
+    if requested:
+        return requested
+
+    user = User.query.get(int(user_id))
+    domain = user.email.rsplit("@", 1)[-1].lower() if user else ""
+    return current_app.config["TENANT_MODEL_TIERS"].get(domain, DEFAULT_TIER)
+
+
+def probe_video(video_path):
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    video = {
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "frames": total_frames,
+        "duration": total_frames / fps,
+    }
+    cap.release()
+    return video
+
+
+def busy_response(message, status, retry_after):
+    response = jsonify({"error": message})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, status
+
+
 @bp.route("/predict", methods=["POST"])
 @jwt_required()
 def predict():
     user_id = get_jwt_identity()
 
-    if "video" not in request.files:
+    # Everything up to the reservation only looks at headers, so overloaded
+    # or over-limit requests fail before their upload is read.
+    if (request.content_length or 0) > current_app.config["MAX_CONTENT_LENGTH"]:
+        return jsonify({"error": "Video file is too large"}), 413
+
+    level = overload.evaluate()
+    if level >= OverloadController.REJECT:
+        return busy_response("Server is busy, please retry later", 429, overload.retry_after())
+
+    try:
+        ticket = admission.reserve(int(user_id))
+    except AdmissionRejected as e:
+        return busy_response(str(e), e.status, e.retry_after)
+
+    try:
+        return run_prediction(user_id, ticket, level)
+    finally:
+        admission.release(ticket)
+
+
+def run_prediction(user_id, ticket, level):
+    # Reading request.files receives and parses the multipart upload
+    with stage_timer.span("upload"):
+        files = request.files
+
+    if "video" not in files:
         return jsonify({"error": "No video file uploaded"}), 400
 
-    file = request.files["video"]
+    file = files["video"]
     name = request.form.get("name")
     age = request.form.get("age")
     gender = request.form.get("gender")
 
+    tier = resolve_model_tier(user_id, request.form.get("tier"))
+    if tier not in CONFIGURED_TIERS:
+        return jsonify(
+            {"error": f"Invalid tier. Must be one of: {', '.join(CONFIGURED_TIERS)}"}
+        ), 400
+
+    if level >= OverloadController.CHEAPER_TIER:
+        tier = cheapest_tier()
+    num_frames = overload.num_frames(level, current_app.config["NUM_FRAMES"])
+
+    # Long-video mode and TTA are the first things dropped under load
+    long_video = request.form.get("mode") == "long" and level == OverloadController.NORMAL
+    tta = request.form.get("tta", "").lower() in ("1", "true")
+    tta = (tta or current_app.config["TTA_DEFAULT"]) and level == OverloadController.NORMAL
+    uncertainty = request.form.get("uncertainty", "").lower() in ("1", "true")
+
+    cheap_tier = current_app.config["CASCADE_CHEAP_TIER"]
+    cascade = (
+        current_app.config["CASCADE_ENABLED"]
+        and cheap_tier in CONFIGURED_TIERS
+        and is_cheaper(cheap_tier, tier)
+    )
+    lease_tiers = (cheap_tier, tier) if cascade else (tier,)
+
     os.makedirs("video", exist_ok=True)
     fileName = f"{hash(file.filename)}_{file.filename}"
     save_path = os.path.join("video", fileName)
-    file.save(save_path)
+    with stage_timer.span("save"):
+        file.save(save_path)
 
-    try:
-        frames = extract_frames(save_path)
+    with stage_timer.span("probe"):
+        video = probe_video(save_path)
+    analysis = None
 
-        if frames.size == 0:
-            return jsonify({"error": "Failed to extract frames"}), 500
+    if long_video:
+        window_seconds = current_app.config["LONG_VIDEO_WINDOW_SECONDS"]
+        num_windows = int(np.ceil(video["duration"] / window_seconds))
+        num_windows = min(max(num_windows, 1), current_app.config["LONG_VIDEO_MAX_WINDOWS"])
+        stride = current_app.config["LONG_VIDEO_STRIDE"]
+        num_frames = (num_windows - 1) * stride + current_app.config["NUM_FRAMES"]
 
-        frames = frames.astype("float32") / 255.0
+    with overload.track():
+        try:
+            with stage_timer.span("queue"):
+                admission.start(ticket, admission.estimate_cost(video, num_frames, tta=tta))
+        except AdmissionRejected as e:
+            return busy_response(str(e), e.status, e.retry_after)
 
         try:
-            scores = predict_ocean(frames)
-        except Exception as e:
-            return jsonify({"error": f"Predict failed: {e}"}), 500
+            if long_video:
+                frames, windows = extract_windows(
+                    save_path,
+                    num_windows,
+                    num_frames=current_app.config["NUM_FRAMES"],
+                    stride=stride,
+                    target_size=FRAME_SIZE,
+                )
+            else:
+                frames = extract_frames(save_path, num_frames=num_frames, target_size=FRAME_SIZE)
+
+            if frames.size == 0:
+                return jsonify({"error": "Failed to extract frames"}), 500
+
+            with stage_timer.span("convert"):
+                frames = frames.astype("float32") / 255.0
+
+            try:
+                with get_registry().lease(*lease_tiers) as versions:
+                    if long_video:
+                        analysis = predict_ocean_windows(frames, windows, tier=tier, tta=tta)
+                        scores = analysis.pop("scores")
+                    elif num_frames < current_app.config["NUM_FRAMES"]:
+                        scores = predict_ocean_reduced(frames, tier=tier, tta=tta)
+                    elif uncertainty:
+                        result = predict_ocean_uncertainty(
+                            frames,
+                            tier=tier,
+                            samples=current_app.config["MC_DROPOUT_SAMPLES"],
+                            tta=tta,
+                        )
+                        scores = result.pop("scores")
+                        analysis = {"uncertainty": result}
+                    elif cascade:
+                        result = predict_ocean_cascade(
+                            frames,
+                            cheap_tier=cheap_tier,
+                            full_tier=tier,
+                            margin=current_app.config["CASCADE_MARGIN"],
+                            max_spread=current_app.config["CASCADE_MAX_SPREAD"],
+                            samples=current_app.config["CASCADE_SAMPLES"],
+                            tta=tta,
+                        )
+                        scores = result.pop("scores")
+                        tier = result.pop("tier")
+                        analysis = {"cascade": result}
+                    else:
+                        scores = predict_ocean(frames, tier=tier, tta=tta)
+                model_version = versions[tier].version
+            except Exception as e:
+                return jsonify({"error": f"Predict failed: {e}"}), 500
 
-    except Exception as e:
-        return jsonify({"error": f"Frame extraction failed: {e}"}), 500
+        except Exception as e:
+            return jsonify({"error": f"Frame extraction failed: {e}"}), 500
 
     try:
         detection = Detection(
@@ -91,10 +289,14 @@ def predict():
             extraversion=scores["Extraversion"],
             agreeableness=scores["Agreeableness"],
             neuroticism=scores["Neuroticism"],
+            model_tier=tier,
+            model_version=model_version,
+            degradation_level=level,
         )
 
-        db.session.add(detection)
-        db.session.commit()
+        with stage_timer.span("db"):
+            db.session.add(detection)
+            db.session.commit()
     except Exception as e:
         return jsonify({"error": f"Database error: {e}"}), 500
 
@@ -111,6 +313,9 @@ def predict():
     results_data = {key: detection.pop(key) for key in ocean_keys if key in detection}
     detection["results"] = results_data
 
+    if analysis is not None:
+        detection["analysis"] = analysis
+
     return jsonify(detection)
 
 
@@ -260,11 +465,12 @@ def generate_report(detection_id):
 
         owner = User.query.get(detection.user_id)
 
-        pdf_buffer = generate_pdf_report(
-            detection=detection,
-            user_name=owner.name,
-            user_email=owner.email,
-        )
+        with stage_timer.span("pdf"):
+            pdf_buffer = generate_pdf_report(
+                detection=detection,
+                user_name=owner.name,
+                user_email=owner.email,
+            )
 
         safe_name = detection.name.replace(" ", "_") if detection.name else "report"
         filename = f"OCEAN_Report_{safe_name}_{detection_id}.pdf"
@@ -304,11 +510,12 @@ def preview_report(detection_id):
 
         owner = User.query.get(detection.user_id)
 
-        pdf_buffer = generate_pdf_report(
-            detection=detection,
-            user_name=owner.name,
-            user_email=owner.email,
-        )
+        with stage_timer.span("pdf"):
+            pdf_buffer = generate_pdf_report(
+                detection=detection,
+                user_name=owner.name,
+                user_email=owner.email,
+            )
 
         safe_name = detection.name.replace(" ", "_") if detection.name else "report"
         filename = f"OCEAN_Report_{safe_name}_{detection_id}.pdf"
@@ -0,0 +1,121 @@
+"""
+Inference Buffer Arena
+
+Requests of the same shape need the same scratch buffers: the normalized
+frame stack, the backbone's 235x235 input batch, staging chunks and the
+embedding output. Allocating them per request churns the allocator and
+fragments RSS under steady load, so they are borrowed from a pool keyed by
+shape, dtype and pinning, and returned after the request.
+
+Only buffers whose lifetime ends inside the inference path are pooled;
+anything returned to callers is allocated normally.
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Idle buffers kept for reuse, in MiB (0 = no pooling, every acquire allocates)
+ARENA_MB = int(os.getenv("OCEAN_ARENA_MB", "256"))
+
+
+class BufferArena:
+
+    def __init__(self, max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._free: dict[tuple, list[torch.Tensor]] = {}
+        # id(tensor) -> (key, nbytes) for buffers handed out
+        self._live: dict[int, tuple[tuple, int]] = {}
+        self._pooled_bytes = 0
+        self._live_bytes = 0
+        self._peak_bytes = 0
+        self._acquires = 0
+        self._reuses = 0
+        self._dropped = 0
+
+    def acquire(
+        self, shape: tuple[int, ...], dtype: torch.dtype = torch.float32, pin: bool = False
+    ) -> torch.Tensor:
+        """
+        Borrow an uninitialized CPU tensor. Give it back with ``release``.
+
+        Args:
+            shape: Tensor shape. NumPy callers use ``tensor.numpy()``.
+            dtype: Tensor dtype.
+            pin: Page-locked memory, for non-blocking copies to CUDA.
+        """
+        key = (tuple(shape), dtype, pin)
+        with self._lock:
+            self._acquires += 1
+            pool = self._free.get(key)
+            if pool:
+                tensor = pool.pop()
+                self._pooled_bytes -= tensor.nbytes
+                self._reuses += 1
+            else:
+                tensor = None
+
+        if tensor is None:
+            tensor = torch.empty(key[0], dtype=dtype, pin_memory=pin)
+
+        with self._lock:
+            self._live[id(tensor)] = (key, tensor.nbytes)
+            self._live_bytes += tensor.nbytes
+            self._peak_bytes = max(self._peak_bytes, self._live_bytes + self._pooled_bytes)
+        return tensor
+
+    def release(self, tensor: torch.Tensor) -> None:
+        """Return a borrowed tensor. Tensors not from this arena are ignored."""
+        with self._lock:
+            entry = self._live.pop(id(tensor), None)
+            if entry is None:
+                return
+            key, nbytes = entry
+            self._live_bytes -= nbytes
+
+            if self._pooled_bytes + nbytes > self.max_bytes:
+                self._dropped += 1
+                return
+            self._free.setdefault(key, []).append(tensor)
+            self._pooled_bytes += nbytes
+
+    @contextmanager
+    def borrow(
+        self, shape: tuple[int, ...], dtype: torch.dtype = torch.float32, pin: bool = False
+    ) -> Iterator[torch.Tensor]:
+        """``acquire`` a tensor for the duration of a ``with`` block."""
+        tensor = self.acquire(shape, dtype, pin)
+        try:
+            yield tensor
+        finally:
+            self.release(tensor)
+
+    def clear(self) -> None:
+        """Drop every idle buffer."""
+        with self._lock:
+            self._free.clear()
+            self._pooled_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "budget_mib": round(self.max_bytes / 2**20, 1),
+                "acquires": self._acquires,
+                "reuses": self._reuses,
+                "reuse_ratio": round(self._reuses / self._acquires, 4) if self._acquires else None,
+                "dropped": self._dropped,
+                "shapes": len(self._free),
+                "live_mib": round(self._live_bytes / 2**20, 2),
+                "pooled_mib": round(self._pooled_bytes / 2**20, 2),
+                "peak_mib": round(self._peak_bytes / 2**20, 2),
+            }
+
+
+arena = BufferArena(max_bytes=ARENA_MB * 2**20)
@@ -0,0 +1,182 @@
+"""
+Inference Benchmarks
+
+Small timing helpers and benchmarks for the OCEAN inference path, run through
+the ``flask bench-*`` commands.
+"""
+
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+import tensorflow as tf
+import torch
+from tensorflow import keras
+
+from .predict import EMBEDDING_DIM, NUM_FRAMES, build_serving_fn, embed_frames
+
+
+def random_frames(n: int, size: tuple[int, int] = (112, 112)) -> np.ndarray:
+    """Random frames in [0, 1] with shape (n, H, W, 3), as fed by ``routes.predict``."""
+    return np.random.rand(n, size[1], size[0], 3).astype(np.float32)
+
+
+def time_call(fn: Callable[[], object], runs: int = 10, warmup: int = 2) -> dict[str, float]:
+    """
+    Time repeated calls of ``fn``.
+
+    Returns:
+        Mean, p50, p95 and min latency in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples = np.array(samples)
+    return {
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "min_ms": round(float(samples.min()), 3),
+    }
+
+
+def bench_tta(backbone: torch.nn.Module, clips: int = 1, runs: int = 5) -> dict:
+    """
+    Compare backbone cost with and without flip TTA.
+
+    Args:
+        backbone: PyTorch PolyFace backbone.
+        clips: Number of 10-frame clips per call.
+        runs: Timed runs per mode.
+
+    Returns:
+        Timings for both modes and the TTA/plain cost ratio.
+    """
+    frames = random_frames(clips * NUM_FRAMES)
+
+    plain = time_call(lambda: embed_frames(frames, backbone), runs=runs)
+    tta = time_call(lambda: embed_frames(frames, backbone, tta=True), runs=runs)
+
+    return {
+        "frames": len(frames),
+        "plain": plain,
+        "tta": tta,
+        "ratio": round(tta["mean_ms"] / plain["mean_ms"], 2),
+    }
+
+
+def bench_serving(model: keras.Model, head: keras.Model, runs: int = 50) -> dict[str, dict]:
+    """
+    Compare per-call overhead of Keras ``predict`` and traced serving functions.
+
+    The head is timed on its own, so the numbers are dominated by fixed
+    per-call cost rather than backbone compute. The full model is timed
+    once per mode with fewer runs.
+
+    Args:
+        model: Full OCEAN model.
+        head: Head from ``build_head``.
+        runs: Timed head calls per mode.
+
+    Returns:
+        Timings per mode, as ``time_call`` results.
+    """
+    embeddings = np.random.rand(1, NUM_FRAMES, EMBEDDING_DIM).astype(np.float32)
+    frames = random_frames(NUM_FRAMES, size=tuple(model.input_shape[2:4][::-1]))[None, ...]
+
+    head_fn = build_serving_fn(head, (NUM_FRAMES, EMBEDDING_DIM))
+    head_xla = build_serving_fn(head, (NUM_FRAMES, EMBEDDING_DIM), jit_compile=True)
+    model_fn = build_serving_fn(model, tuple(model.input_shape[1:]))
+    x_emb, x_frames = tf.constant(embeddings), tf.constant(frames)
+
+    full_runs = max(1, runs // 10)
+    return {
+        "head predict()": time_call(lambda: head.predict(embeddings, verbose=0), runs=runs),
+        "head tf.function": time_call(lambda: head_fn(x_emb).numpy(), runs=runs),
+        "head tf.function+XLA": time_call(lambda: head_xla(x_emb).numpy(), runs=runs),
+        "model predict()": time_call(lambda: model.predict(frames, verbose=0), runs=full_runs),
+        "model tf.function": time_call(lambda: model_fn(x_frames).numpy(), runs=full_runs),
+    }
+
+
+def bench_threads(
+    backbone: torch.nn.Module,
+    configs: list[tuple[int, int]],
+    size: tuple[int, int] = (112, 112),
+    runs: int = 5,
+) -> dict[str, dict]:
+    """
+    Sweep thread budgets under concurrent load.
+
+    Each ``(workers, threads)`` config runs ``workers`` clips at once, each
+    with ``threads`` intra-op threads, the way that many worker processes
+    with that budget would share the machine. Oversubscribed configs show
+    up as higher latency with no throughput gain.
+
+    Args:
+        backbone: PyTorch PolyFace backbone.
+        configs: ``(workers, threads)`` pairs to run.
+        size: Frame size fed to the backbone.
+        runs: Clips per worker.
+
+    Returns:
+        Per config: ``time_call``-style clip latency and clips per second.
+    """
+    frames = random_frames(NUM_FRAMES, size=size)
+    previous = torch.get_num_threads()
+    embed_frames(frames, backbone)
+    results = {}
+
+    try:
+        for workers, threads in configs:
+            samples: list[float] = []
+            lock = threading.Lock()
+            ready = threading.Barrier(workers + 1)
+
+            def worker():
+                # OpenMP thread counts are per calling thread
+                torch.set_num_threads(threads)
+                embed_frames(frames, backbone)
+                ready.wait()
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    embed_frames(frames, backbone)
+                    with lock:
+                        samples.append((time.perf_counter() - start) * 1000)
+
+            pool = [threading.Thread(target=worker) for _ in range(workers)]
+            for t in pool:
+                t.start()
+            ready.wait()
+            start = time.perf_counter()
+            for t in pool:
+                t.join()
+            elapsed = time.perf_counter() - start
+
+            ms = np.array(samples)
+            results[f"{workers} x {threads} threads"] = {
+                "mean_ms": round(float(ms.mean()), 3),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "min_ms": round(float(ms.min()), 3),
+                "clips_per_s": round(len(ms) / elapsed, 2),
+            }
+    finally:
+        torch.set_num_threads(previous)
+
+    return results
+
+
+def format_timings(rows: dict[str, dict[str, float]]) -> str:
+    """Render ``{label: time_call(...)}`` as a text table."""
+    lines = [f"{'Mode':<24} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}", "-" * 57]
+    for label, t in rows.items():
+        lines.append(f"{label:<24} {t['mean_ms']:>10.2f} {t['p50_ms']:>10.2f} {t['p95_ms']:>10.2f}")
+    return "\n".join(lines)
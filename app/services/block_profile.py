@@ -0,0 +1,241 @@
+"""
+Per-block Backbone Profiler
+
+Attaches forward hooks to the APolynet stages (stem, every a10/b20/c10
+block, the a2b/b2c transitions and fc) and records wall time, FLOPs and
+output bytes per stage over several runs. The report shows where pruning,
+fusion or quantization would pay off; the Chrome trace (chrome://tracing,
+Perfetto) shows the same spans on a timeline.
+
+FLOPs count multiply-accumulates (x2) of Conv2d and Linear layers, as in
+``prune.count_flops``, but for the whole batch.
+"""
+
+import json
+import logging
+import time
+from collections import defaultdict
+
+import numpy as np
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+# Stage groups, in forward order
+GROUPS = ("stem", "a10", "a2b", "b20", "b2c", "c10", "fc")
+
+
+def stage_modules(polyface: nn.Module) -> list[tuple[str, nn.Module]]:
+    """Profiled stages of a PolyFace backbone as ``(name, module)`` in forward order."""
+    net = polyface.backbone
+    stages = []
+    for group in GROUPS:
+        module = getattr(net, group)
+        if isinstance(module, nn.Sequential):
+            stages += [(f"{group}.{i}", block) for i, block in enumerate(module)]
+        else:
+            stages.append((group, module))
+    return stages
+
+
+def _nbytes(output) -> int:
+    if isinstance(output, torch.Tensor):
+        return output.nbytes
+    if isinstance(output, dict):
+        return sum(_nbytes(o) for o in output.values())
+    if isinstance(output, (list, tuple)):
+        return sum(_nbytes(o) for o in output)
+    return 0
+
+
+def profile_blocks(
+    polyface: nn.Module,
+    batch: int = 10,
+    size: tuple[int, int] = (112, 112),
+    runs: int = 10,
+    warmup: int = 1,
+) -> dict:
+    """
+    Profile every backbone stage over ``runs`` forward passes.
+
+    Args:
+        polyface: PyTorch PolyFace backbone in eval mode.
+        batch: Frames per forward pass.
+        size: Frame size fed to the backbone.
+        runs: Profiled forward passes.
+        warmup: Unprofiled passes before the first run.
+
+    Returns:
+        ``stages`` (per stage: mean/min ms, FLOPs, output bytes), ``total_ms``
+        (mean full forward, including frame preparation) and ``events`` for
+        the Chrome trace.
+
+    Raises:
+        RuntimeError: If no stage ran, e.g. the body runs on ONNX Runtime.
+    """
+    device = next(polyface.parameters()).device
+    sync = torch.cuda.synchronize if device.type == "cuda" else (lambda: None)
+    x = torch.from_numpy(
+        np.random.randint(0, 256, (batch, 3, size[1], size[0])).astype(np.float32)
+    ).to(device)
+
+    times = defaultdict(list)
+    flops = defaultdict(int)
+    nbytes = {}
+    events = []
+    state = {"stage": None, "start": 0.0, "recording": False, "origin": 0.0}
+
+    def pre_hook(name):
+        def hook(module, inputs):
+            sync()
+            state["stage"], state["start"] = name, time.perf_counter()
+        return hook
+
+    def post_hook(name):
+        def hook(module, inputs, output):
+            sync()
+            end = time.perf_counter()
+            state["stage"] = None
+            if not state["recording"]:
+                return
+            times[name].append((end - state["start"]) * 1000)
+            nbytes[name] = _nbytes(output)
+            events.append((name, state["start"] - state["origin"], end - state["start"]))
+        return hook
+
+    def conv_hook(module, inputs, output):
+        if state["recording"] and state["stage"] and len(times[state["stage"]]) == 0:
+            kh, kw = module.kernel_size
+            flops[state["stage"]] += (
+                2 * output.numel() * module.in_channels // module.groups * kh * kw
+            )
+
+    def linear_hook(module, inputs, output):
+        if state["recording"] and state["stage"] and len(times[state["stage"]]) == 0:
+            flops[state["stage"]] += 2 * output.shape[0] * module.in_features * module.out_features
+
+    handles = []
+    for name, module in stage_modules(polyface):
+        handles.append(module.register_forward_pre_hook(pre_hook(name)))
+        handles.append(module.register_forward_hook(post_hook(name)))
+    for module in polyface.modules():
+        if isinstance(module, nn.Conv2d):
+            handles.append(module.register_forward_hook(conv_hook))
+        elif isinstance(module, nn.Linear):
+            handles.append(module.register_forward_hook(linear_hook))
+
+    totals = []
+    try:
+        with torch.no_grad():
+            for _ in range(warmup):
+                polyface(x)
+
+            state["recording"] = True
+            state["origin"] = time.perf_counter()
+            for _ in range(runs):
+                sync()
+                start = time.perf_counter()
+                polyface(x)
+                sync()
+                end = time.perf_counter()
+                totals.append((end - start) * 1000)
+                events.append(("forward", start - state["origin"], end - start))
+    finally:
+        for handle in handles:
+            handle.remove()
+
+    if not times:
+        raise RuntimeError("No backbone stage ran; profile the eager or compiled backend")
+
+    stages = {
+        name: {
+            "mean_ms": float(np.mean(times[name])),
+            "min_ms": float(np.min(times[name])),
+            "flops": flops[name],
+            "output_bytes": nbytes[name],
+        }
+        for name, _ in stage_modules(polyface)
+        if name in times
+    }
+    return {
+        "batch": batch,
+        "runs": runs,
+        "total_ms": float(np.mean(totals)),
+        "stages": stages,
+        "events": events,
+    }
+
+
+def group_totals(report: dict) -> dict[str, dict]:
+    """Sum the per-block stats of ``profile_blocks`` into the stage groups."""
+    groups = {}
+    for name, stats in report["stages"].items():
+        group = groups.setdefault(
+            name.split(".")[0], {"blocks": 0, "mean_ms": 0.0, "flops": 0, "output_bytes": 0}
+        )
+        group["blocks"] += 1
+        group["mean_ms"] += stats["mean_ms"]
+        group["flops"] += stats["flops"]
+        group["output_bytes"] += stats["output_bytes"]
+    return groups
+
+
+def format_block_profile(report: dict, top: int = 0) -> str:
+    """
+    Render ``profile_blocks`` as text tables: stage groups, then blocks.
+
+    Args:
+        report: Result of ``profile_blocks``.
+        top: Only list the ``top`` slowest blocks (0 = all, in forward order).
+    """
+    total = report["total_ms"]
+    header = (
+        f"{'Stage':<10} {'mean ms':>10} {'share':>7} {'GFLOP':>9} "
+        f"{'GFLOP/s':>9} {'out MiB':>9}"
+    )
+
+    def row(name, stats):
+        gflop = stats["flops"] / 1e9
+        rate = gflop / (stats["mean_ms"] / 1000) if stats["mean_ms"] else 0.0
+        return (
+            f"{name:<10} {stats['mean_ms']:>10.2f} {stats['mean_ms'] / total:>7.1%} "
+            f"{gflop:>9.3f} {rate:>9.1f} {stats['output_bytes'] / 2**20:>9.2f}"
+        )
+
+    lines = [f"Batch {report['batch']}, {report['runs']} runs, forward {total:.1f} ms", ""]
+    lines += [header, "-" * len(header)]
+    groups = group_totals(report)
+    for name, stats in groups.items():
+        lines.append(row(name, stats))
+    other = total - sum(g["mean_ms"] for g in groups.values())
+    lines.append(f"{'other':<10} {other:>10.2f} {other / total:>7.1%}  (frame preparation, hooks)")
+
+    stages = report["stages"].items()
+    if top:
+        stages = sorted(stages, key=lambda item: item[1]["mean_ms"], reverse=True)[:top]
+    lines += ["", header, "-" * len(header)]
+    lines += [row(name, stats) for name, stats in stages]
+    return "\n".join(lines)
+
+
+def save_chrome_trace(report: dict, path: str) -> None:
+    """Write the profiled spans as a Chrome trace (JSON object format, ``traceEvents``)."""
+    stages = report["stages"]
+    keys = ("flops", "output_bytes")
+    trace = [
+        {
+            "name": name,
+            "cat": "forward" if name == "forward" else name.split(".")[0],
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": 0,
+            "tid": 0,
+            "args": {k: stages[name][k] for k in keys} if name in stages else {},
+        }
+        for name, start, duration in report["events"]
+    ]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+    logger.info(f"Chrome trace with {len(trace)} spans written to {path}")
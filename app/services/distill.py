@@ -0,0 +1,263 @@
+"""
+PolyFace Knowledge Distillation
+
+Trains the shallow PolyFace backbone (apolynet_stodepth, 10/20/10 blocks) to
+reproduce the normalized 256-d embeddings of the deeper serving backbone
+(apolynet_stodepth_deeper, 23/38/23 blocks), and reports how close the
+student gets to the teacher.
+"""
+
+import glob
+import logging
+import os
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from .predict import NUM_FRAMES, OCEAN_TRAITS, embed_frames
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# Data
+# =============================================================================
+
+def load_face_clips(
+    data_dir: str,
+    num_frames: int = NUM_FRAMES,
+    image_size: tuple[int, int] = (112, 112),
+) -> np.ndarray:
+    """
+    Load face crops written by ``utils_extract.extract_face_from_one_video``.
+
+    Every sub-folder of ``data_dir`` is one video; its first ``num_frames``
+    face images (sorted by name) form one clip. Folders with fewer faces are
+    skipped.
+
+    Args:
+        data_dir: Directory containing one folder of face images per video.
+        num_frames: Number of frames per clip.
+        image_size: Target (width, height) of each frame.
+
+    Returns:
+        Clips with shape (clips, num_frames, H, W, 3), RGB uint8.
+
+    Raises:
+        ValueError: If no complete clip was found.
+    """
+    clips = []
+
+    for video_dir in sorted(glob.glob(os.path.join(data_dir, "*"))):
+        if not os.path.isdir(video_dir):
+            continue
+
+        paths = sorted(
+            p for p in glob.glob(os.path.join(video_dir, "*"))
+            if p.lower().endswith((".jpg", ".jpeg", ".png"))
+        )
+        if len(paths) < num_frames:
+            logger.debug(f"Skipping {video_dir}: {len(paths)} faces")
+            continue
+
+        frames = []
+        for path in paths[:num_frames]:
+            frame = cv2.imread(path)
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            frames.append(cv2.resize(frame, image_size))
+        clips.append(frames)
+
+    if not clips:
+        raise ValueError(f"No clips with {num_frames} faces found in {data_dir}")
+
+    return np.array(clips, dtype=np.uint8)
+
+
+def _serving_inputs(frames: np.ndarray) -> np.ndarray:
+    """Scale uint8 frames the same way ``routes.predict`` does before inference."""
+    return frames.astype(np.float32) / 255.0
+
+
+# =============================================================================
+# Training
+# =============================================================================
+
+def distill_student(
+    teacher: torch.nn.Module,
+    student: torch.nn.Module,
+    frames: np.ndarray,
+    epochs: int = 10,
+    batch_size: int = 32,
+    lr: float = 1e-3,
+    device: Optional[torch.device] = None,
+) -> list[float]:
+    """
+    Train ``student`` to match the teacher's normalized embeddings.
+
+    Teacher embeddings are computed once up front since the teacher is
+    frozen. The loss is ``1 - cosine_similarity`` between the two unit
+    vectors.
+
+    Args:
+        teacher: Deeper PolyFace backbone (frozen).
+        student: Shallow PolyFace backbone to train.
+        frames: Face frames with shape (N, 112, 112, 3), uint8.
+        epochs: Number of passes over ``frames``.
+        batch_size: Frames per optimizer step. Must be > 1 for BatchNorm.
+        lr: AdamW learning rate.
+        device: Training device. Defaults to the student's device.
+
+    Returns:
+        Mean loss per epoch.
+    """
+    device = device or next(student.parameters()).device
+    inputs = _serving_inputs(frames)
+
+    logger.info(f"Computing teacher embeddings for {len(inputs)} frames...")
+    targets = torch.from_numpy(embed_frames(inputs, teacher.eval()))
+
+    student = student.to(device).train()
+    optimizer = torch.optim.AdamW(student.parameters(), lr=lr)
+    history = []
+
+    for epoch in range(epochs):
+        order = np.random.permutation(len(inputs))
+        losses = []
+
+        for i in range(0, len(order), batch_size):
+            idx = order[i : i + batch_size]
+            if len(idx) < 2:
+                continue
+
+            x = torch.from_numpy(inputs[idx]).permute(0, 3, 1, 2).float().to(device)
+            target = targets[idx].to(device)
+
+            out = student(x)
+            loss = (1.0 - F.cosine_similarity(out, target, dim=1)).mean()
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            losses.append(loss.item())
+
+        history.append(float(np.mean(losses)) if losses else 0.0)
+        logger.info(f"Epoch {epoch + 1}/{epochs} - distill loss {history[-1]:.5f}")
+
+    student.eval()
+    return history
+
+
+def save_student(student: torch.nn.Module, path: str) -> None:
+    """Save the student backbone weights for the "shallow" model tier."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.save(student.state_dict(), path)
+    logger.info(f"Student saved to {path}")
+
+
+def save_teacher(teacher: torch.nn.Module, path: str) -> None:
+    """
+    Save the teacher backbone weights the student was distilled against.
+
+    The deeper tier loads them, so the student keeps matching the teacher's
+    embedding space in later processes. Weights already saved are the ones
+    the teacher was loaded from and are kept.
+    """
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.save(teacher.state_dict(), path)
+    logger.info(f"Teacher saved to {path}")
+
+
+# =============================================================================
+# Report
+# =============================================================================
+
+def _throughput(backbone: torch.nn.Module, frames: np.ndarray, runs: int) -> float:
+    """Measure backbone throughput in frames per second."""
+    embed_frames(frames[:2], backbone)  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        embed_frames(frames, backbone)
+    elapsed = time.perf_counter() - start
+
+    return len(frames) * runs / elapsed
+
+
+def compare_models(
+    teacher: torch.nn.Module,
+    student: torch.nn.Module,
+    head,
+    clips: np.ndarray,
+    runs: int = 3,
+) -> dict:
+    """
+    Compare teacher and student side by side.
+
+    Args:
+        teacher: Deeper PolyFace backbone.
+        student: Distilled shallow PolyFace backbone.
+        head: Embedding-to-OCEAN model from ``predict.build_head``.
+        clips: Clips with shape (clips, 10, 112, 112, 3), uint8.
+        runs: Number of timed passes for throughput.
+
+    Returns:
+        Report with embedding cosine similarity, per-trait OCEAN MAE (in
+        percentage points) and backbone throughput.
+    """
+    n_clips = clips.shape[0]
+    frames = _serving_inputs(clips.reshape(-1, *clips.shape[2:]))
+
+    teacher_emb = embed_frames(frames, teacher.eval())
+    student_emb = embed_frames(frames, student.eval())
+    cosine = np.sum(teacher_emb * student_emb, axis=1)
+
+    teacher_scores = head.predict(teacher_emb.reshape(n_clips, NUM_FRAMES, -1), verbose=0)
+    student_scores = head.predict(student_emb.reshape(n_clips, NUM_FRAMES, -1), verbose=0)
+    mae = np.abs(teacher_scores - student_scores).mean(axis=0) * 100
+
+    teacher_fps = _throughput(teacher, frames, runs)
+    student_fps = _throughput(student, frames, runs)
+
+    return {
+        "clips": n_clips,
+        "cosine": {
+            "mean": float(cosine.mean()),
+            "min": float(cosine.min()),
+            "p5": float(np.percentile(cosine, 5)),
+        },
+        "ocean_mae": {trait: round(float(v), 2) for trait, v in zip(OCEAN_TRAITS, mae)},
+        "ocean_mae_mean": round(float(mae.mean()), 2),
+        "throughput_fps": {
+            "teacher": round(teacher_fps, 2),
+            "student": round(student_fps, 2),
+        },
+        "speedup": round(student_fps / teacher_fps, 2),
+    }
+
+
+def format_report(report: dict) -> str:
+    """Render a ``compare_models`` report as a text table."""
+    lines = [
+        f"Clips compared: {report['clips']}",
+        "",
+        f"{'Metric':<28} {'Value':>10}",
+        "-" * 39,
+        f"{'Embedding cosine (mean)':<28} {report['cosine']['mean']:>10.4f}",
+        f"{'Embedding cosine (p5)':<28} {report['cosine']['p5']:>10.4f}",
+        f"{'Embedding cosine (min)':<28} {report['cosine']['min']:>10.4f}",
+    ]
+    for trait, mae in report["ocean_mae"].items():
+        lines.append(f"{'MAE ' + trait:<28} {mae:>10.2f}")
+    lines += [
+        f"{'MAE mean':<28} {report['ocean_mae_mean']:>10.2f}",
+        f"{'Teacher frames/s':<28} {report['throughput_fps']['teacher']:>10.2f}",
+        f"{'Student frames/s':<28} {report['throughput_fps']['student']:>10.2f}",
+        f"{'Speedup':<28} {report['speedup']:>9.2f}x",
+    ]
+    return "\n".join(lines)
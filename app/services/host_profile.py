@@ -0,0 +1,83 @@
+"""
+Host Inference Profile
+
+The fastest backbone backend, frame chunk size and thread count depend on
+the CPU, so ``flask tune`` measures them on each node and writes them here.
+The model service and the thread budget read the profile at startup.
+
+A profile only applies on the host it was measured on. One copied to a
+different CPU (e.g. baked into an image) is ignored with a warning.
+Explicit OCEAN_BACKEND, OCEAN_CHUNK_SIZE and THREADS_PER_WORKER settings
+always take precedence.
+
+Kept free of Torch/TensorFlow imports: the thread budget reads it before
+those libraries load.
+"""
+
+import json
+import logging
+import os
+import platform
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PATH = os.getenv(
+    "OCEAN_HOST_PROFILE",
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "models", "host_profile.json"),
+)
+
+
+def host_signature() -> dict:
+    """CPU model, architecture and core count identifying this host type."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return {"cpu": cpu, "arch": platform.machine(), "cores": os.cpu_count() or 1}
+
+
+def load_profile(path: str = PROFILE_PATH) -> dict:
+    """
+    Load the host profile.
+
+    Returns:
+        The tuned settings, or an empty dict when there is no profile, it
+        cannot be read, or it was measured on a different host.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable host profile {path}: {e}")
+        return {}
+
+    if profile.get("host") != host_signature():
+        logger.warning(
+            f"Ignoring host profile {path}: tuned on {profile.get('host')}, "
+            f"running on {host_signature()}. Run `flask tune` on this host."
+        )
+        return {}
+    return profile.get("settings", {})
+
+
+def save_profile(settings: dict, results: dict, path: str = PROFILE_PATH) -> None:
+    """
+    Write a host profile for this host.
+
+    Args:
+        settings: Chosen ``backend``, ``chunk_size`` and ``threads``.
+        results: Measurements the settings were chosen from.
+        path: Output path.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"host": host_signature(), "settings": settings, "results": results}, f, indent=2)
+    logger.info(f"Saved host profile to {path}: {settings}")
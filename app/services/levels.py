@@ -0,0 +1,20 @@
+"""
+OCEAN Score Levels
+
+Thresholds that split a trait score (0-100) into high, medium and low,
+shared by the predictors and the insight texts.
+"""
+
+# Threshold definitions
+HIGH_THRESHOLD = 60
+MEDIUM_THRESHOLD = 40
+
+
+def get_level(score: float) -> str:
+    """Determine the level based on score threshold."""
+    if score >= HIGH_THRESHOLD:
+        return "high"
+    elif score >= MEDIUM_THRESHOLD:
+        return "medium"
+    else:
+        return "low"
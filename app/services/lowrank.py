@@ -0,0 +1,142 @@
+"""
+Low-rank Factorization of the PolyFace FC Head
+
+``get_fc_E`` flattens the 2048x6x6 feature map into one
+``nn.Linear(73728, 256)`` (~19M parameters). A rank-r SVD replaces it with
+``Linear(73728, r) -> Linear(r, 256)``, i.e. r * (73728 + 256) + 256
+parameters.
+"""
+
+import logging
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+
+
+def _fc_head(polyface: nn.Module) -> nn.Module:
+    """Get the ``get_fc_E`` module of a PolyFace wrapper."""
+    return polyface.backbone.fc
+
+
+def factorize_linear(linear: nn.Linear, rank: int) -> nn.Sequential:
+    """
+    Approximate ``linear`` with two smaller Linears via truncated SVD.
+
+    Args:
+        linear: Layer with weight (out, in).
+        rank: Inner dimension, at most min(out, in).
+
+    Returns:
+        ``nn.Sequential(Linear(in, rank, bias=False), Linear(rank, out))``.
+    """
+    weight = linear.weight.data.float()
+    u, s, vh = torch.linalg.svd(weight, full_matrices=False)
+    rank = min(rank, s.numel())
+    root = s[:rank].sqrt()
+
+    first = nn.Linear(linear.in_features, rank, bias=False)
+    second = nn.Linear(rank, linear.out_features, bias=linear.bias is not None)
+    first.weight.data.copy_(root[:, None] * vh[:rank])
+    second.weight.data.copy_(u[:, :rank] * root[None, :])
+    if linear.bias is not None:
+        second.bias.data.copy_(linear.bias.data)
+
+    return nn.Sequential(first, second).to(linear.weight.device)
+
+
+def factorize_fc(polyface: nn.Module, rank: int) -> nn.Module:
+    """
+    Replace the FC layer of a PolyFace backbone with a rank-``rank`` factorization in place.
+
+    Returns:
+        The same ``polyface`` module.
+    """
+    head = _fc_head(polyface)
+    if not isinstance(head.fc, nn.Linear):
+        raise ValueError("FC layer is already factorized")
+
+    before = head.fc.weight.numel()
+    head.fc = factorize_linear(head.fc, rank)
+    after = sum(p.numel() for p in head.fc.parameters()) - head.fc[1].bias.numel()
+    logger.info(f"Factorized FC at rank {rank}: {before:,} -> {after:,} weights")
+
+    return polyface
+
+
+def _capture_fc_inputs(polyface: nn.Module, frames_nhwc: np.ndarray) -> torch.Tensor:
+    """Run the backbone once and capture the flattened input of the FC layer."""
+    head = _fc_head(polyface)
+    captured = []
+
+    handle = head.fc.register_forward_pre_hook(lambda _, inputs: captured.append(inputs[0].detach()))
+    try:
+        device = next(polyface.parameters()).device
+        with torch.no_grad():
+            x = torch.from_numpy(frames_nhwc).permute(0, 3, 1, 2).float().to(device)
+            polyface(x)
+    finally:
+        handle.remove()
+
+    return torch.cat(captured, 0)
+
+
+def rank_report(polyface: nn.Module, frames_nhwc: np.ndarray, ranks: list[int]) -> list[dict]:
+    """
+    Measure embedding fidelity of the factorized FC per rank.
+
+    The backbone runs once; each rank only recomputes the FC and ``bn2`` on
+    the captured FC inputs, so no model copies are needed.
+
+    Args:
+        polyface: PolyFace backbone with its original FC layer, in eval mode.
+        frames_nhwc: Preprocessed frames with shape (N, 112, 112, 3).
+        ranks: Ranks to evaluate.
+
+    Returns:
+        One row per rank with parameter count, compression, retained
+        spectral energy and cosine similarity to the full-rank embedding.
+    """
+    head = _fc_head(polyface)
+    linear = head.fc
+    inputs = _capture_fc_inputs(polyface, frames_nhwc)
+
+    with torch.no_grad():
+        reference = F.normalize(head.bn2(linear(inputs)), p=2, dim=1)
+        singular = torch.linalg.svdvals(linear.weight.data.float())
+        energy = singular.pow(2).cumsum(0) / singular.pow(2).sum()
+
+        rows = []
+        for rank in ranks:
+            factorized = factorize_linear(linear, rank)
+            approx = F.normalize(head.bn2(factorized(inputs)), p=2, dim=1)
+            cosine = (reference * approx).sum(dim=1).cpu().numpy()
+            params = rank * (linear.in_features + linear.out_features)
+
+            rows.append({
+                "rank": rank,
+                "params": params,
+                "compression": round(linear.weight.numel() / params, 2),
+                "energy": round(float(energy[min(rank, energy.numel()) - 1]), 4),
+                "cosine_mean": round(float(cosine.mean()), 4),
+                "cosine_min": round(float(cosine.min()), 4),
+            })
+
+    return rows
+
+
+def format_rank_report(rows: list[dict]) -> str:
+    """Render a ``rank_report`` as a text table."""
+    lines = [
+        f"{'Rank':>6} {'Params':>12} {'Compr.':>8} {'Energy':>8} {'Cos mean':>10} {'Cos min':>10}",
+        "-" * 59,
+    ]
+    for r in rows:
+        lines.append(
+            f"{r['rank']:>6} {r['params']:>12,} {r['compression']:>7.1f}x {r['energy']:>8.4f} "
+            f"{r['cosine_mean']:>10.4f} {r['cosine_min']:>10.4f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,133 @@
+"""
+Activation Memory
+
+In eval, every PolyFace block normally keeps its input, an identity clone,
+all branch outputs and their concatenation alive at once. With 84 blocks at
+384-2048 channels that sets the peak memory of a batch. The lean forward
+(``polyfacemodels2.lean_concat`` / ``lean_residual``) writes each branch
+straight into the concat buffer, drops it, and adds the residual in place.
+It only runs without autograd, so training and distillation are unchanged.
+
+``profile_memory`` measures peak bytes per batch size for both forwards.
+"""
+
+import logging
+import time
+from typing import Callable
+
+import numpy as np
+import torch
+from torch import nn
+
+from .polyfacemodels2 import BlockA, BlockA2B, BlockB, BlockB2C, BlockC
+
+logger = logging.getLogger(__name__)
+
+LEAN_BLOCKS = (BlockA, BlockA2B, BlockB, BlockB2C, BlockC)
+
+
+def set_lean_forward(polyface: nn.Module, enabled: bool) -> None:
+    """Switch every block of a PolyFace backbone to the lean forward, or back."""
+    for module in polyface.modules():
+        if isinstance(module, LEAN_BLOCKS):
+            module.lean = enabled
+
+
+def peak_bytes(fn: Callable[[], object], device: torch.device) -> int:
+    """
+    Peak bytes allocated by PyTorch while ``fn`` runs, above the starting level.
+
+    Uses the CUDA allocator statistics on GPU and the profiler's allocation
+    events on CPU.
+    """
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+        base = torch.cuda.memory_allocated(device)
+        torch.cuda.reset_peak_memory_stats(device)
+        fn()
+        torch.cuda.synchronize(device)
+        return torch.cuda.max_memory_allocated(device) - base
+
+    from torch.profiler import ProfilerActivity, profile
+
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        fn()
+
+    # Self usage only: an op's total also counts its children, which have
+    # their own events
+    events = sorted(
+        (e for e in prof.events() if e.self_cpu_memory_usage),
+        key=lambda e: e.time_range.start,
+    )
+    live = peak = 0
+    for event in events:
+        live += event.self_cpu_memory_usage
+        peak = max(peak, live)
+    return peak
+
+
+def profile_memory(
+    polyface: nn.Module,
+    batch_sizes: list[int],
+    size: tuple[int, int] = (112, 112),
+) -> dict[int, dict]:
+    """
+    Peak memory and latency of the default and lean forwards per batch size.
+
+    Args:
+        polyface: PyTorch PolyFace backbone in eval mode.
+        batch_sizes: Frames per forward pass.
+        size: Frame size fed to the backbone.
+
+    Returns:
+        Per batch size: ``{"default": {...}, "lean": {...}}`` with ``peak_bytes``
+        and ``ms``, plus the max absolute embedding difference between them.
+    """
+    device = next(polyface.parameters()).device
+    previous = {m: m.lean for m in polyface.modules() if isinstance(m, LEAN_BLOCKS)}
+    report = {}
+
+    try:
+        for batch in batch_sizes:
+            x = torch.from_numpy(
+                np.random.randint(0, 256, (batch, 3, size[1], size[0])).astype(np.float32)
+            ).to(device)
+            outputs, row = {}, {}
+
+            for mode in ("default", "lean"):
+                set_lean_forward(polyface, mode == "lean")
+                with torch.no_grad():
+                    polyface(x)
+                    row[mode] = {
+                        "peak_bytes": peak_bytes(lambda: polyface(x), device),
+                    }
+                    start = time.perf_counter()
+                    outputs[mode] = polyface(x)
+                    row[mode]["ms"] = (time.perf_counter() - start) * 1000
+
+            row["max_diff"] = float((outputs["default"] - outputs["lean"]).abs().max())
+            report[batch] = row
+            logger.info(f"batch={batch}: {row}")
+    finally:
+        for module, lean in previous.items():
+            module.lean = lean
+
+    return report
+
+
+def format_memory(report: dict[int, dict]) -> str:
+    """Render a ``profile_memory`` report as a text table."""
+    lines = [
+        f"{'Batch':>6} {'default MiB':>12} {'lean MiB':>10} {'saved':>7} "
+        f"{'default ms':>11} {'lean ms':>9} {'max diff':>10}",
+        "-" * 71,
+    ]
+    for batch, row in report.items():
+        default, lean = row["default"], row["lean"]
+        saved = 1 - lean["peak_bytes"] / default["peak_bytes"] if default["peak_bytes"] else 0.0
+        default_mib, lean_mib = default["peak_bytes"] / 2**20, lean["peak_bytes"] / 2**20
+        lines.append(
+            f"{batch:>6} {default_mib:>12.1f} {lean_mib:>10.1f} {saved:>7.1%} "
+            f"{default['ms']:>11.1f} {lean['ms']:>9.1f} {row['max_diff']:>10.2e}"
+        )
+    return "\n".join(lines)
@@ -10,6 +10,8 @@ from torch.utils.checkpoint import checkpoint
 from torch.nn.functional import interpolate
 import cv2
 
+from .arena import arena
+
 class get_fc_E(nn.Module):
     def __init__(self, BN, in_feature, in_h, in_w, out_feature):
         super(get_fc_E, self).__init__()
@@ -32,6 +34,40 @@ __all__ = ['apolynet_stodepth', 'apolynet_stodepth_deep', 'apolynet_stodepth_dee
 
 BN = None
 
+
+# --------------------------------------------------
+# Forward hemat memori aktivasi (hanya inferensi tanpa autograd)
+# --------------------------------------------------
+def use_lean(block):
+    return block.lean and not block.training and not torch.is_grad_enabled()
+
+
+def lean_concat(x, branches):
+    # cabang dihitung satu per satu dan langsung disalin ke buffer concat,
+    # jadi hanya satu output cabang yang hidup pada satu waktu
+    channels = []
+    for branch in branches:
+        convs = [m for m in branch.modules() if isinstance(m, nn.Conv2d)]
+        channels.append(convs[-1].out_channels if convs else x.size(1))
+
+    buf, offset = None, 0
+    for branch in branches:
+        y = branch(x)
+        if buf is None:
+            buf = y.new_empty((y.size(0), sum(channels), y.size(2), y.size(3)))
+        buf[:, offset:offset + y.size(1)].copy_(y)
+        offset += y.size(1)
+        del y
+    return buf
+
+
+def lean_residual(block, x, branches):
+    # tanpa clone identity: residual ditambahkan in-place ke input blok
+    out = block.stem(lean_concat(x, branches))
+    x.add_(out, alpha=0.3 * block.prob if block.multFlag else 0.3)
+    del out
+    return x.relu_()
+
 class BasicConv2d(nn.Module):
 
     def __init__(self, in_channels, out_channels, kernel_size, stride, padding):
@@ -116,6 +152,8 @@ class Stem(nn.Module):
 
 class BlockA(nn.Module):
 
+    lean = False
+
     def __init__(self, use_checkpoint=False, keep_prob=0.8, multFlag=True):
         super(BlockA, self).__init__()
         self.use_checkpoint = use_checkpoint
@@ -139,6 +177,8 @@ class BlockA(nn.Module):
         self.relu = nn.ReLU(inplace = True)
 
     def forward(self, x):
+        if use_lean(self):
+            return lean_residual(self, x, (self.branch0, self.branch1, self.branch2))
         a = torch.equal(self.m.sample(),torch.ones(1))
         identity = x.clone()
         if self.training:
@@ -238,6 +278,8 @@ class BlockABranch(nn.Module):
 
 class BlockA2B(nn.Module):
 
+    lean = False
+
     def __init__(self):
         super(BlockA2B, self).__init__()
         self.branch0 = nn.Sequential(
@@ -249,6 +291,8 @@ class BlockA2B(nn.Module):
         self.branch2 = nn.MaxPool2d(kernel_size = 3, stride = 2, padding = 0, ceil_mode=True)
 
     def forward(self, x):
+        if use_lean(self):
+            return lean_concat(x, (self.branch0, self.branch1, self.branch2))
         x0 = self.branch0(x)
         x1 = self.branch1(x)
         x2 = self.branch2(x)
@@ -257,6 +301,8 @@ class BlockA2B(nn.Module):
 
 class BlockB(nn.Module):
 
+    lean = False
+
     def __init__(self, use_checkpoint=False, keep_prob=0.8, multFlag=True):
         super(BlockB, self).__init__()
 
@@ -277,6 +323,8 @@ class BlockB(nn.Module):
         self.relu = nn.ReLU(inplace = True)
 
     def forward(self, x):
+        if use_lean(self):
+            return lean_residual(self, x, (self.branch0, self.branch1))
         a = torch.equal(self.m.sample(),torch.ones(1))
         identity = x.clone()
         if self.training:
@@ -361,6 +409,8 @@ class BlockBBranch(nn.Module):
 
 class BlockB2C(nn.Module):
 
+    lean = False
+
     def __init__(self):
         super(BlockB2C, self).__init__()
         self.branch0 = nn.Sequential(
@@ -379,6 +429,8 @@ class BlockB2C(nn.Module):
         self.branch3 = nn.MaxPool2d(kernel_size = 3, stride = 2, padding = 0, ceil_mode=True)
 
     def forward(self, x):
+        if use_lean(self):
+            return lean_concat(x, (self.branch0, self.branch1, self.branch2, self.branch3))
         x0 = self.branch0(x)
         x1 = self.branch1(x)
         x2 = self.branch2(x)
@@ -388,6 +440,8 @@ class BlockB2C(nn.Module):
 
 class BlockC(nn.Module):
 
+    lean = False
+
     def __init__(self, use_checkpoint=False, keep_prob=0.8, multFlag=True):
         super(BlockC, self).__init__()
         self.use_checkpoint = use_checkpoint
@@ -407,6 +461,8 @@ class BlockC(nn.Module):
         self.relu = nn.ReLU(inplace = True)
 
     def forward(self, x):
+        if use_lean(self):
+            return lean_residual(self, x, (self.branch0, self.branch1))
         a = torch.equal(self.m.sample(),torch.ones(1))
         identity = x.clone()
         if self.training:
@@ -471,10 +527,18 @@ class APolynet(nn.Module):
     def __init__(self, feature_dim, bn_mom=0.1, bn_eps=1e-10, fc_type='E',
                  num_blocks=[10, 20, 10],
                  checkpoints=[0, 0, 0],
-                 att_mode='none'):
+                 att_mode='none',
+                 input_size=235):
         super(APolynet, self).__init__()
 
         self.att_mode = att_mode
+        # sisi gambar yang masuk ke stem; frame yang sudah berukuran ini tidak di-resize lagi
+        self.input_size = input_size
+        # dtype autocast untuk stem..fc (mis. torch.bfloat16), None = FP32
+        self.autocast_dtype = None
+        # ambil batch input dari arena.arena (singleton proses), False = alokasi biasa;
+        # arena tidak disimpan di modul agar deepcopy/state_dict tetap bisa
+        self.use_arena = False
 
         global BN
         def BNFunc(*args, **kwargs):
@@ -522,41 +586,56 @@ class APolynet(nn.Module):
         return nn.Sequential(*layers)
 
     def forward(self, x, flip=False):
-        output = {}
-
-        img_list = []
+        shape = (x.size(0), 3, self.input_size, self.input_size)
+        batch = arena.acquire(shape) if self.use_arena else torch.empty(shape)
+        try:
+            x = self.prepare(x, flip=flip, out=batch)
+            return {k: v.float() for k, v in self.body(x).items()}
+        finally:
+            # hanya buffer yang memang diambil dari arena yang dikembalikan
+            if self.use_arena:
+                arena.release(batch)
+
+    def prepare(self, x, flip=False, out=None):
+        # frame uint8 (B,3,H,W) -> tensor float ternormalisasi (B,3,input_size,input_size)
+        shape = (x.size(0), 3, self.input_size, self.input_size)
+        batch = torch.empty(shape) if out is None else out
         for cnt in range(x.size(0)):
             tmp = x[cnt]
             tmp = tmp.cpu().numpy()
             tmp = tmp.astype(np.uint8)
             tmp = tmp.transpose((1, 2, 0))
-            tmp = cv2.resize(tmp[1:, 1:, :], (235, 235))
+            if tmp.shape[0] != self.input_size or tmp.shape[1] != self.input_size:
+                tmp = cv2.resize(tmp[1:, 1:, :], (self.input_size, self.input_size))
             tmp = tmp*3.2/255.0 - 1.6
-            if flip:
+            # flip bisa bool (semua gambar) atau mask per gambar (untuk TTA)
+            if (flip[cnt] if isinstance(flip, (list, tuple, np.ndarray)) else flip):
                 tmp = cv2.flip(tmp, 1)
-            tmp = tmp.transpose((2, 0, 1))
-            tmp = torch.from_numpy(tmp)
-            tmp = tmp.float()
-            tmp = tmp[None, ...]
-            img_list.append(tmp)
-        x = torch.cat(img_list, 0)
-        x = x.cuda()
-
-        ori = x
-        x = self.stem(x)
+            batch[cnt].copy_(torch.from_numpy(tmp.transpose((2, 0, 1))))
+
+        device = next(self.parameters()).device
+        if device.type == 'cpu':
+            return batch
+        return batch.to(device)
+
+    def body(self, x):
+        # stem..fc; bisa diganti per instance dengan backend lain (compiled/ONNX)
+        with torch.autocast(device_type=x.device.type, dtype=self.autocast_dtype or torch.bfloat16,
+                            enabled=self.autocast_dtype is not None):
+            x = self.stem(x)
+
+            if self.att_mode == 'none':
+                x = self.a10(x)
+                x = self.a2b(x)
+                x = self.b20(x)
+                x = self.b2c(x)
+                x = self.c10(x)
+            else:
+                raise RuntimeError('unknown att_mode: {}'.format(self.att_mode))
 
-        if self.att_mode == 'none':
-            x = self.a10(x)
-            x = self.a2b(x)
-            x = self.b20(x)
-            x = self.b2c(x)
-            x = self.c10(x)
-        else:
-            raise RuntimeError('unknown att_mode: {}'.format(self.att_mode))
+            headout= self.fc(x)
 
-        headout= self.fc(x)
-        output.update(headout)
-        return output
+        return headout
 
 def apolynet_stodepth(feature_dim, **kwargs):
     model = APolynet(feature_dim, **kwargs)
@@ -570,6 +649,33 @@ def apolynet_stodepth_deeper(feature_dim, **kwargs):
     model = APolynet(feature_dim, num_blocks=[23, 38, 23], **kwargs)
     return model
 
+def create_model_polyface1(feature_dim=256, input_shape=(112, 112, 3)):
+    """Shallow version (apolynet_stodepth)"""
+    class PolyFace1(nn.Module):
+        def __init__(self, feature_dim):
+            super().__init__()
+            self.backbone = apolynet_stodepth(feature_dim)
+
+        def forward(self, x, flip=False):
+            # sama seperti PolyFace3: input uint8 [0..255] (B,3,H,W)
+            features = self.backbone(x, flip=flip)['feature']
+            return nn.functional.normalize(features, p=2, dim=1)
+
+    return PolyFace1(feature_dim)
+
+def create_model_polyface2(feature_dim=256, input_shape=(112, 112, 3)):
+    """Deeper version (apolynet_stodepth_deep)"""
+    class PolyFace2(nn.Module):
+        def __init__(self, feature_dim):
+            super().__init__()
+            self.backbone = apolynet_stodepth_deep(feature_dim)
+
+        def forward(self, x, flip=False):
+            features = self.backbone(x, flip=flip)['feature']
+            return nn.functional.normalize(features, p=2, dim=1)
+
+    return PolyFace2(feature_dim)
+
 def create_model_polyface3(feature_dim=256, input_shape=(112, 112, 3)):
     """Deepest version (apolynet_stodepth_deeper)"""
     class PolyFace3(nn.Module):
@@ -578,11 +684,11 @@ def create_model_polyface3(feature_dim=256, input_shape=(112, 112, 3)):
             # langsung pakai backbone, tanpa preprocessing tambahan
             self.backbone = apolynet_stodepth_deeper(feature_dim)
 
-        def forward(self, x):
+        def forward(self, x, flip=False):
             # IMPORTANT:
             # EfficientPolyFace EXPECTS uint8 [0..255] image in (B,3,H,W)
             # lalu dia sendiri resize ke 235x235 dan normalisasi
-            features = self.backbone(x)['feature']
+            features = self.backbone(x, flip=flip)['feature']
             return nn.functional.normalize(features, p=2, dim=1)
 
     return PolyFace3(feature_dim)
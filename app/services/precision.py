@@ -0,0 +1,162 @@
+"""
+Mixed-precision Inference
+
+bfloat16 keeps the FP32 exponent range, so the PolyFace backbone and the
+OCEAN head can run under autocast without loss scaling. It only pays off on
+CPUs with native BF16 units (AVX512-BF16 or AMX). Elsewhere it is emulated
+and slower than FP32, so "auto" falls back to FP32.
+"""
+
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+import torch
+
+from .levels import get_level
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "bf16", "auto")
+
+# /proc/cpuinfo flags of CPUs with native bfloat16 arithmetic
+BF16_CPU_FLAGS = {"avx512_bf16", "amx_bf16"}
+
+
+# =============================================================================
+# Detection
+# =============================================================================
+
+def cpu_flags() -> set[str]:
+    """CPU feature flags from /proc/cpuinfo, empty when unavailable."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def bf16_supported(device: torch.device) -> bool:
+    """Whether ``device`` computes bfloat16 natively."""
+    if device.type == "cuda":
+        return torch.cuda.is_bf16_supported()
+    return bool(cpu_flags() & BF16_CPU_FLAGS)
+
+
+def resolve_precision(requested: str, device: torch.device) -> str:
+    """
+    Resolve a configured precision to the one actually used.
+
+    Args:
+        requested: "fp32", "bf16" or "auto".
+        device: Device the backbone runs on.
+
+    Returns:
+        "bf16" when requested (or "auto") and supported, else "fp32".
+
+    Raises:
+        ValueError: If the precision is unknown.
+    """
+    if requested not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {requested}. Must be one of: {', '.join(PRECISIONS)}")
+
+    if requested == "fp32":
+        return "fp32"
+    if bf16_supported(device):
+        logger.info(f"bfloat16 inference enabled on {device}")
+        return "bf16"
+
+    if requested == "bf16":
+        logger.warning(f"bfloat16 requested but {device} has no native support; using FP32")
+    return "fp32"
+
+
+def keras_dtype(precision: str) -> Optional[str]:
+    """Keras dtype policy for the OCEAN head layers."""
+    return "mixed_bfloat16" if precision == "bf16" else None
+
+
+def set_backbone_precision(polyface: torch.nn.Module, precision: str) -> None:
+    """Run the PolyFace backbone under bfloat16 autocast, or back in FP32."""
+    polyface.backbone.autocast_dtype = torch.bfloat16 if precision == "bf16" else None
+
+
+# =============================================================================
+# Parity Check
+# =============================================================================
+
+def parity_check(polyface: torch.nn.Module, heads: dict, clips: np.ndarray, runs: int = 3) -> dict:
+    """
+    Compare bfloat16 against FP32 inference on the same weights.
+
+    Args:
+        polyface: PyTorch PolyFace backbone.
+        heads: ``{"fp32": head, "bf16": head}`` Keras heads from ``build_head``.
+        clips: Clips with shape (clips, 10, 112, 112, 3), uint8.
+        runs: Timed backbone runs per precision.
+
+    Returns:
+        Embedding cosine similarity, per-trait score deltas in percentage
+        points, trait level changes and the backbone speedup.
+    """
+    from .predict import NUM_FRAMES, OCEAN_TRAITS, embed_frames
+
+    frames = clips.reshape(-1, *clips.shape[2:]).astype(np.float32) / 255.0
+    previous = polyface.backbone.autocast_dtype
+    embeddings, scores, seconds = {}, {}, {}
+
+    try:
+        for precision in ("fp32", "bf16"):
+            set_backbone_precision(polyface, precision)
+            embed_frames(frames[:NUM_FRAMES], polyface)
+
+            start = time.perf_counter()
+            for _ in range(runs):
+                emb = embed_frames(frames, polyface)
+            seconds[precision] = (time.perf_counter() - start) / runs
+
+            embeddings[precision] = emb
+            batch = emb.reshape(len(clips), NUM_FRAMES, -1)
+            scores[precision] = np.asarray(heads[precision](batch, training=False)) * 100
+    finally:
+        polyface.backbone.autocast_dtype = previous
+
+    cosine = (embeddings["fp32"] * embeddings["bf16"]).sum(axis=1)
+    delta = np.abs(scores["fp32"] - scores["bf16"])
+    level_changes = sum(
+        get_level(a) != get_level(b)
+        for a, b in zip(scores["fp32"].ravel(), scores["bf16"].ravel())
+    )
+
+    return {
+        "clips": len(clips),
+        "cosine": {"mean": float(cosine.mean()), "min": float(cosine.min())},
+        "delta_mean": {t: float(d) for t, d in zip(OCEAN_TRAITS, delta.mean(axis=0))},
+        "delta_max": float(delta.max()),
+        "level_changes": int(level_changes),
+        "speedup": seconds["fp32"] / seconds["bf16"],
+    }
+
+
+def format_parity(report: dict) -> str:
+    """Render a ``parity_check`` report as a text table."""
+    lines = [
+        f"Clips compared: {report['clips']}",
+        "",
+        f"{'Metric':<28} {'Value':>10}",
+        "-" * 39,
+        f"{'Embedding cosine (mean)':<28} {report['cosine']['mean']:>10.4f}",
+        f"{'Embedding cosine (min)':<28} {report['cosine']['min']:>10.4f}",
+    ]
+    for trait, delta in report["delta_mean"].items():
+        lines.append(f"{'Delta ' + trait:<28} {delta:>10.2f}")
+    lines += [
+        f"{'Delta max':<28} {report['delta_max']:>10.2f}",
+        f"{'Level changes':<28} {report['level_changes']:>10}",
+        f"{'Backbone speedup':<28} {report['speedup']:>9.2f}x",
+    ]
+    return "\n".join(lines)
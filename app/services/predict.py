@@ -5,9 +5,16 @@ Provides model loading and prediction functions for OCEAN personality traits.
 Refactored for cleaner code structure and reduced verbosity.
 """
 
+import copy
+import hashlib
 import os
 import logging
-from typing import Optional
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
 
 import numpy as np
 import tensorflow as tf
@@ -15,7 +22,23 @@ from tensorflow import keras
 from keras import layers, models
 import torch
 
-from .polyfacemodels2 import create_model_polyface3, wrap_polyface_tf
+from .polyfacemodels2 import (
+    create_model_polyface1,
+    create_model_polyface2,
+    create_model_polyface3,
+    wrap_polyface_tf,
+)
+from .arena import arena
+from .host_profile import load_profile
+from .levels import HIGH_THRESHOLD, MEDIUM_THRESHOLD, get_level
+from .lowrank import factorize_fc
+from .memory import set_lean_forward
+from .precision import keras_dtype, resolve_precision, set_backbone_precision
+from .prune import load_pruned
+from .resolution import FULL_SIZE, load_adapted
+from .registry import ModelRegistry, ModelVersion
+from .telemetry import BATCH_FRAMES, MODEL_LOAD_SECONDS, stage_span
+from .tune import apply_backend
 
 # =============================================================================
 # Configuration
@@ -26,44 +49,369 @@ logger = logging.getLogger(__name__)
 BASE_DIR = os.path.dirname(os.path.realpath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "models", "1127_145313", "polyface.t5")
 MODEL_PATH_H5 = os.path.join(BASE_DIR, "models", "keras", "polyface_adagrad.h5")
+STUDENT_PATH = os.path.join(BASE_DIR, "models", "student", "polyface_shallow.pt")
+# Deeper backbone the student was distilled against, saved by `flask distill`
+TEACHER_PATH = os.path.join(BASE_DIR, "models", "student", "polyface_deeper.pt")
+PRUNED_DIR = os.path.join(BASE_DIR, "models", "pruned")
+SPILL_DIR = os.path.join(BASE_DIR, "models", "cache")
+RESOLUTION_DIR = os.path.join(BASE_DIR, "models", "resolution")
+
+NUM_FRAMES = 10
+EMBEDDING_DIM = 256
 
 OCEAN_TRAITS = ["Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism"]
 
-# Global model cache
-_model_instance: Optional[keras.Model] = None
+
+@dataclass(frozen=True)
+class ModelTier:
+    """Backbone factory and weight locations for one speed/accuracy tier."""
+
+    factory: Callable[[], torch.nn.Module]
+    # Head checkpoints, tried in order
+    checkpoints: tuple[str, ...]
+    # Backbone state dict; required when set
+    backbone_path: Optional[str] = None
+    # Backbone state dict loaded when it exists
+    weights_path: Optional[str] = None
+    h5_path: Optional[str] = None
+    # Heads of the teacher (deeper) tier, tried after ``checkpoints`` by a
+    # backbone distilled from it; only valid once the teacher's weights are
+    # persisted at TEACHER_PATH, otherwise they score unrelated features
+    teacher_checkpoints: tuple[str, ...] = ()
+
+    @property
+    def head_checkpoints(self) -> tuple[str, ...]:
+        """Head checkpoints to try, in order."""
+        if os.path.exists(TEACHER_PATH):
+            return self.checkpoints + self.teacher_checkpoints
+        return self.checkpoints
+
+
+@dataclass(frozen=True)
+class ServingModel:
+    """Head and traced head signature of one loaded model version."""
+
+    version: str
+    model: keras.Model
+    head: keras.Model
+    # tf.function, or None when OCEAN_COMPILED_SERVING is off
+    predict_embeddings: Optional[Callable]
+
+
+MODEL_TIERS: dict[str, ModelTier] = {
+    # The distilled student reproduces the embeddings of the persisted
+    # teacher, so it can fall back to the deeper head until it has its own.
+    "shallow": ModelTier(
+        factory=create_model_polyface1,
+        checkpoints=(os.path.join(BASE_DIR, "models", "shallow", "polyface.t5"),),
+        backbone_path=STUDENT_PATH,
+        teacher_checkpoints=(MODEL_PATH,),
+    ),
+    "deep": ModelTier(
+        factory=create_model_polyface2,
+        checkpoints=(os.path.join(BASE_DIR, "models", "deep", "polyface.t5"),),
+    ),
+    "deeper": ModelTier(
+        factory=create_model_polyface3,
+        checkpoints=(MODEL_PATH,),
+        weights_path=TEACHER_PATH,
+        h5_path=MODEL_PATH_H5,
+    ),
+}
+
+# Variants of a tier, configured as "<tier>:<variant>" (e.g. "deeper:int8"):
+#   int8 - backbone Linear layers dynamically quantized to int8 (CPU only)
+VARIANTS = ("int8",)
+
+# Tiers kept loaded by this process, cheapest first
+CONFIGURED_TIERS = [
+    tier.strip() for tier in os.getenv("OCEAN_MODEL_TIERS", "deeper").split(",") if tier.strip()
+]
+DEFAULT_TIER = os.getenv("OCEAN_DEFAULT_TIER", "deeper")
+
+# RAM budget for loaded models in MiB (0 = unlimited). Least recently used
+# tiers are evicted and reloaded on their next use.
+MODEL_MEMORY_MB = int(os.getenv("OCEAN_MODEL_MEMORY_MB", "0"))
+
+# Serve the backbone FC layer as a rank-r SVD factorization (0 = full rank).
+# Pick the rank with `flask factorize-fc`.
+FC_RANK = int(os.getenv("OCEAN_FC_RANK", "0"))
+
+# Run backbone blocks with the activation-lean forward (branches written into
+# one concat buffer, residual added in place). Compare with `flask profile-memory`.
+LEAN_FORWARD = os.getenv("OCEAN_LEAN_FORWARD", "false").lower() == "true"
+
+# Serve the channel-pruned backbone from PRUNED_DIR/<tier>.pt when present.
+# Build it with `flask prune`.
+USE_PRUNED = os.getenv("OCEAN_PRUNED", "false").lower() == "true"
+
+# Backbone input resolution:
+#   upsample - 112x112 frames are upsampled to 235x235 inside the backbone
+#   native   - the backbone runs at OCEAN_INPUT_SIZE with a pooled FC layer,
+#              built with `flask adapt-resolution`
+#   direct   - frames are decoded straight to 235x235 from the source video
+INPUT_MODE = os.getenv("OCEAN_INPUT_MODE", "upsample")
+INPUT_SIZE = int(os.getenv("OCEAN_INPUT_SIZE", "112"))
+FRAME_SIZE = (FULL_SIZE, FULL_SIZE) if INPUT_MODE == "direct" else (112, 112)
+
+# Serve the head through a tf.function signature traced once per model
+# instead of Keras predict(), which rebuilds a tf.data pipeline on every
+# call. OCEAN_JIT_COMPILE compiles that signature with XLA. The backbone
+# runs in PyTorch (embed_frames), so the full model is not traced.
+COMPILED_SERVING = os.getenv("OCEAN_COMPILED_SERVING", "true").lower() == "true"
+JIT_COMPILE = os.getenv("OCEAN_JIT_COMPILE", "false").lower() == "true"
+
+# Global model cache; serving heads are keyed by registry entry (version)
 _feature_extractor_instance = None
+_feature_extractor_lock = threading.Lock()
+_serving_instances: dict[ModelVersion, ServingModel] = {}
+_serving_lock = threading.Lock()
 _device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+# Backbone backend (eager, compiled, onnx, int8) and frames per backbone batch.
+# Defaults come from this host's `flask tune` profile when there is one.
+HOST_PROFILE = load_profile()
+BACKEND = os.getenv("OCEAN_BACKEND", HOST_PROFILE.get("backend", "eager"))
+CHUNK_SIZE = int(os.getenv("OCEAN_CHUNK_SIZE", HOST_PROFILE.get("chunk_size", 64)))
+
+# Cascade outcomes since startup
+_cascade_lock = threading.Lock()
+_cascade_counts = {"requests": 0, "escalated": 0}
+
+# Inference precision: fp32, bf16 or auto (bf16 on AVX512-BF16/AMX CPUs).
+# Resolved once at startup; unsupported bf16 falls back to fp32.
+PRECISION = resolve_precision(os.getenv("OCEAN_PRECISION", "fp32"), _device)
+
 
 # =============================================================================
 # Model Building
 # =============================================================================
 
-def build_model() -> keras.Model:
+def build_model(
+    polyface_model: Optional[torch.nn.Module] = None,
+    precision: str = PRECISION,
+) -> keras.Model:
     """
     Build the OCEAN prediction model architecture.
 
+    Args:
+        polyface_model: PyTorch PolyFace backbone to wrap. Defaults to a
+                        PolyFace3 (deeper) backbone (see ``load_teacher``).
+        precision: "bf16" runs the head layers under a mixed_bfloat16 policy.
+
     Returns:
         Compiled Keras model for OCEAN personality prediction.
     """
-    polyface_model_tf = wrap_polyface_tf(create_model_polyface3())
+    if polyface_model is None:
+        polyface_model = load_teacher()
+
+    polyface_model_tf = wrap_polyface_tf(polyface_model)
     polyface_tflayer = polyface_model_tf.layers[-1]
     polyface_tflayer.trainable = False
 
-    inputs = layers.Input(shape=(10, 112, 112, 3), name="input_video")
+    inputs = layers.Input(shape=(NUM_FRAMES, FRAME_SIZE[1], FRAME_SIZE[0], 3), name="input_video")
     x = layers.TimeDistributed(polyface_tflayer, name="polyface112")(inputs)
-    x = layers.LSTM(units=128, return_sequences=True)(x)
-    x = layers.LSTM(units=64)(x)
+    dtype = keras_dtype(precision)
+    x = layers.LSTM(units=128, return_sequences=True, dtype=dtype)(x)
+    x = layers.LSTM(units=64, dtype=dtype)(x)
     x = layers.Dropout(0.2)(x)
-    x = layers.Dense(units=1024)(x)
-    x = layers.Dense(units=512, activation="relu")(x)
-    x = layers.Dense(256, activation="relu")(x)
+    x = layers.Dense(units=1024, dtype=dtype)(x)
+    x = layers.Dense(units=512, activation="relu", dtype=dtype)(x)
+    x = layers.Dense(256, activation="relu", dtype=dtype)(x)
     x = layers.Dropout(0.5)(x)
-    outputs = layers.Dense(5, activation="sigmoid", name="OCEAN")(x)
+    # Sigmoid outputs stay float32 so scores are not rounded to bfloat16
+    outputs = layers.Dense(5, activation="sigmoid", name="OCEAN", dtype="float32")(x)
 
     return models.Model(inputs, outputs)
 
 
+def build_head(model: keras.Model) -> keras.Model:
+    """
+    Build the embedding-to-OCEAN head of a full OCEAN model.
+
+    The head shares its LSTM/Dense layers (and weights) with ``model``, so
+    scores match the full model for the same backbone embeddings.
+
+    Args:
+        model: Full OCEAN model as returned by ``build_model``.
+
+    Returns:
+        Keras model mapping (batch, 10, 256) embeddings to OCEAN scores.
+    """
+    start = model.layers.index(model.get_layer("polyface112")) + 1
+
+    inputs = layers.Input(shape=(NUM_FRAMES, EMBEDDING_DIM), name="input_embeddings")
+    x = inputs
+    for layer in model.layers[start:]:
+        x = layer(x)
+
+    return models.Model(inputs, x)
+
+
+def split_tier(tier: str) -> tuple[str, Optional[str]]:
+    """
+    Split a tier name into its ``MODEL_TIERS`` base and optional variant.
+
+    Raises:
+        ValueError: If the base tier or variant is unknown.
+    """
+    base, _, variant = tier.partition(":")
+    if base not in MODEL_TIERS or (variant and variant not in VARIANTS):
+        raise ValueError(f"Unknown model tier: {tier}")
+    return base, variant or None
+
+
+def load_state(path: str) -> dict:
+    """
+    Load a state dict memory-mapped where supported (torch >= 2.1).
+
+    Tensors are paged in from the file as they are copied into the module
+    instead of reading the whole file into RAM first.
+    """
+    try:
+        return torch.load(path, map_location="cpu", mmap=True)
+    except (TypeError, RuntimeError):
+        return torch.load(path, map_location="cpu")
+
+
+def load_teacher() -> torch.nn.Module:
+    """
+    Plain PolyFace3 (deeper) backbone with the weights saved at ``TEACHER_PATH``.
+
+    The backbone weights are not part of the OCEAN checkpoints. Until
+    ``flask distill`` has saved them, every process builds the teacher with
+    different random weights.
+    """
+    backbone = create_model_polyface3()
+    if os.path.exists(TEACHER_PATH):
+        backbone.load_state_dict(load_state(TEACHER_PATH))
+    return backbone
+
+
+def spill_path(tier: str, version: str) -> str:
+    """Location of the backbone weights spilled when a model version is evicted."""
+    return os.path.join(SPILL_DIR, f"{tier.replace(':', '_')}@{version}.pt")
+
+
+def pruned_path(tier: str) -> str:
+    """Location of the channel-pruned backbone of ``tier``."""
+    return os.path.join(PRUNED_DIR, f"{tier}.pt")
+
+
+def resolution_path(tier: str, size: int = INPUT_SIZE) -> str:
+    """Location of the backbone of ``tier`` adapted to a native input size."""
+    return os.path.join(RESOLUTION_DIR, f"{tier}_{size}.pt")
+
+
+def create_backbone(tier: str, backend: Optional[str] = None) -> torch.nn.Module:
+    """
+    Create the PyTorch PolyFace backbone for a model tier.
+
+    Args:
+        tier: One of ``MODEL_TIERS``, optionally with a ``VARIANTS`` suffix.
+        backend: Backend to run the backbone on. Defaults to ``BACKEND``.
+
+    Returns:
+        PyTorch PolyFace backbone in eval mode.
+
+    Raises:
+        FileNotFoundError: If the tier needs backbone weights that do not exist.
+        ValueError: If the tier or variant is unknown.
+    """
+    base, variant = split_tier(tier)
+    backend = backend or BACKEND
+    spec = MODEL_TIERS[base]
+    backbone = spec.factory()
+
+    if spec.backbone_path is not None:
+        if not os.path.exists(spec.backbone_path):
+            raise FileNotFoundError(
+                f"Backbone weights for '{tier}' not found: {spec.backbone_path}. "
+                "Run `flask distill` first."
+            )
+        backbone.load_state_dict(load_state(spec.backbone_path))
+    elif spec.weights_path is not None and os.path.exists(spec.weights_path):
+        backbone.load_state_dict(load_state(spec.weights_path))
+
+    pruned = pruned_path(base)
+    if USE_PRUNED and os.path.exists(pruned):
+        load_pruned(backbone, pruned)
+        logger.info(f"Loaded pruned backbone for '{tier}' from {pruned}")
+
+    if INPUT_MODE == "native":
+        adapted_path = resolution_path(base)
+        if not os.path.exists(adapted_path):
+            raise FileNotFoundError(
+                f"Backbone for '{tier}' at {INPUT_SIZE}x{INPUT_SIZE} not found: {adapted_path}. "
+                "Run `flask adapt-resolution` first."
+            )
+        load_adapted(backbone, adapted_path)
+
+    if FC_RANK > 0:
+        factorize_fc(backbone, FC_RANK)
+
+    quantized = variant == "int8" or backend == "int8"
+    if quantized:
+        if _device.type != "cpu":
+            raise ValueError(f"Variant '{tier}' runs on CPU only")
+        backbone = _quantize(backbone)
+
+    # Weights spilled when this version was evicted; the serving backbones
+    # are not all stored on disk, so a fresh build would differ. A spill
+    # written under another backend no longer matches the layers.
+    spilled = spill_path(tier, artifact_version(tier))
+    if backend == BACKEND and os.path.exists(spilled):
+        try:
+            backbone.load_state_dict(load_state(spilled))
+            logger.info(f"Restored '{tier}' backbone from {spilled}")
+        except RuntimeError as e:
+            logger.warning(f"Discarding stale spill {spilled}: {e}")
+            os.remove(spilled)
+
+    return _finish_backbone(backbone, backend, quantized)
+
+
+def derive_backbone(backbone: torch.nn.Module, backend: str) -> torch.nn.Module:
+    """
+    Copy an eager backbone onto another backend, keeping its weights.
+
+    Backbones built separately by ``create_backbone`` only share weights when
+    the tier has them on disk, so backends are compared on derived copies.
+
+    Args:
+        backbone: Backbone from ``create_backbone(tier, backend="eager")``.
+        backend: One of ``tune.BACKENDS``.
+
+    Returns:
+        PyTorch PolyFace backbone in eval mode.
+
+    Raises:
+        ValueError: If the backend is int8 and the device is not the CPU.
+    """
+    quantized = backend == "int8"
+    if quantized and _device.type != "cpu":
+        raise ValueError("Backend 'int8' runs on CPU only")
+
+    backbone = copy.deepcopy(backbone)
+    if quantized:
+        backbone = _quantize(backbone)
+    return _finish_backbone(backbone, backend, quantized)
+
+
+def _quantize(backbone: torch.nn.Module) -> torch.nn.Module:
+    return torch.ao.quantization.quantize_dynamic(backbone, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _finish_backbone(backbone: torch.nn.Module, backend: str, quantized: bool) -> torch.nn.Module:
+    # bfloat16 autocast does not apply to int8 layers
+    set_backbone_precision(backbone, "fp32" if quantized else PRECISION)
+    backbone.eval()
+    backbone.backbone.use_arena = True
+    set_lean_forward(backbone, LEAN_FORWARD)
+    apply_backend(backbone, backend)
+    return backbone
+
+
 def _resolve_checkpoint_path(checkpoint_path: str) -> str:
     """
     Resolve the actual checkpoint path from the checkpoint directory.
@@ -186,11 +534,12 @@ def _load_from_h5(model_path: str) -> Optional[keras.Model]:
 # Public API
 # =============================================================================
 
-def get_model() -> keras.Model:
+def load_model(tier: str) -> keras.Model:
     """
-    Get or load the OCEAN prediction model.
+    Load the OCEAN prediction model for a tier.
 
-    Uses caching to avoid reloading the model on each call.
+    Args:
+        tier: One of ``MODEL_TIERS``.
 
     Returns:
         Loaded and ready-to-use Keras model.
@@ -198,89 +547,322 @@ def get_model() -> keras.Model:
     Raises:
         RuntimeError: If model cannot be loaded.
     """
-    global _model_instance
-
-    if _model_instance is not None:
-        return _model_instance
-
-    logger.info("Loading OCEAN prediction model...")
+    spec = MODEL_TIERS[split_tier(tier)[0]]
+    logger.info(f"Loading OCEAN prediction model ({tier})...")
 
     # Try loading from checkpoint first
-    try:
-        checkpoint_path = _resolve_checkpoint_path(MODEL_PATH)
-        _model_instance = build_model()
-
-        if _load_weights_from_checkpoint(_model_instance, checkpoint_path):
-            logger.info("Model loaded successfully from checkpoint")
-            return _model_instance
-    except FileNotFoundError as e:
-        logger.warning(f"Checkpoint not found: {e}")
-    except Exception as e:
-        logger.warning(f"Failed to load from checkpoint: {e}")
+    for checkpoint in spec.head_checkpoints:
+        try:
+            checkpoint_path = _resolve_checkpoint_path(checkpoint)
+            model = build_model(create_backbone(tier))
+
+            if _load_weights_from_checkpoint(model, checkpoint_path):
+                logger.info(f"Model loaded successfully from checkpoint: {checkpoint_path}")
+                return model
+        except FileNotFoundError as e:
+            logger.warning(f"Checkpoint not found: {e}")
+        except Exception as e:
+            logger.warning(f"Failed to load from checkpoint: {e}")
 
     # Fallback to H5 file
-    _model_instance = _load_from_h5(MODEL_PATH_H5)
-    if _model_instance is not None:
-        return _model_instance
+    if spec.h5_path is not None:
+        model = _load_from_h5(spec.h5_path)
+        if model is not None:
+            return model
 
+    paths = spec.head_checkpoints + ((spec.h5_path,) if spec.h5_path else ())
     raise RuntimeError(
-        "Failed to load model. Ensure checkpoint or H5 file exists at:\n"
-        f"  - Checkpoint: {MODEL_PATH}\n"
-        f"  - H5: {MODEL_PATH_H5}"
+        f"Failed to load '{tier}' model. Ensure a checkpoint or H5 file exists at:\n"
+        + "\n".join(f"  - {path}" for path in paths)
     )
 
 
-def get_feature_extractor():
+def artifact_files(tier: str) -> list[str]:
+    """Existing artifact files a tier loads from, given the current settings."""
+    base = split_tier(tier)[0]
+    spec = MODEL_TIERS[base]
+    files = []
+
+    for checkpoint in spec.head_checkpoints:
+        try:
+            resolved = _resolve_checkpoint_path(checkpoint)
+        except OSError:
+            continue
+        files += [resolved + ".index", resolved + ".data-00000-of-00001"]
+
+    files += [path for path in (spec.backbone_path, spec.weights_path, spec.h5_path) if path]
+    if USE_PRUNED:
+        files.append(pruned_path(base))
+    if INPUT_MODE == "native":
+        files.append(resolution_path(base))
+
+    return [path for path in files if os.path.exists(path)]
+
+
+def artifact_version(tier: str) -> str:
     """
-    Get or load the PolyFace feature extractor.
+    Version of a tier's artifacts: a fingerprint of their paths, sizes and mtimes.
 
-    Returns:
-        PyTorch PolyFace model for feature extraction.
+    Writing a new checkpoint (or repointing the ``checkpoint`` meta file)
+    changes the version, which ``ModelRegistry.watch`` picks up.
     """
-    global _feature_extractor_instance
+    digest = hashlib.sha1()
+    for path in artifact_files(tier):
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:12]
 
-    if _feature_extractor_instance is None:
-        _feature_extractor_instance = create_model_polyface3().to(_device).eval()
 
-    return _feature_extractor_instance
+def model_nbytes(model: keras.Model) -> int:
+    """Approximate resident size of an OCEAN model: backbone tensors plus Keras weights."""
+    total = sum(int(np.prod(w.shape)) * tf.as_dtype(w.dtype).size for w in model.weights)
+
+    for value in get_backbone(model).state_dict().values():
+        # Dynamically quantized Linears store (packed weight, bias) tuples
+        tensors = value if isinstance(value, tuple) else (value,)
+        total += sum(t.numel() * t.element_size() for t in tensors if isinstance(t, torch.Tensor))
+
+    return total
+
+
+def _spill_backbone(entry: ModelVersion) -> None:
+    """Save an evicted model's backbone so its reload restores the same weights."""
+    path = spill_path(entry.tier, entry.version)
+    if os.path.exists(path):
+        return
 
+    os.makedirs(SPILL_DIR, exist_ok=True)
+    # Older versions of the tier can no longer be restored
+    prefix = f"{entry.tier.replace(':', '_')}@"
+    for name in os.listdir(SPILL_DIR):
+        if name.startswith(prefix) and name.endswith(".pt"):
+            os.remove(os.path.join(SPILL_DIR, name))
 
-def clear_model_cache() -> None:
-    """Clear the model cache to free memory."""
-    global _model_instance, _feature_extractor_instance
+    tmp = path + ".tmp"
+    torch.save(get_backbone(entry.model).state_dict(), tmp)
+    os.replace(tmp, path)
+    logger.info(f"Spilled '{entry.tier}' backbone to {path}")
 
-    _model_instance = None
-    _feature_extractor_instance = None
+
+def _release_serving(entry: ModelVersion) -> None:
+    """Drop the serving functions of a drained model version."""
+    with _serving_lock:
+        _serving_instances.pop(entry, None)
 
     if torch.cuda.is_available():
         torch.cuda.empty_cache()
 
-    logger.info("Model cache cleared")
 
+def _observe_load(entry: ModelVersion) -> None:
+    MODEL_LOAD_SECONDS.labels(entry.tier).observe(entry.load_seconds)
 
-def preprocess(frames: np.ndarray) -> np.ndarray:
+
+_registry = ModelRegistry(
+    load_model,
+    CONFIGURED_TIERS,
+    version_fn=artifact_version,
+    on_release=_release_serving,
+    budget_bytes=MODEL_MEMORY_MB * 2**20,
+    size_fn=model_nbytes,
+    on_evict=_spill_backbone,
+    on_load=_observe_load,
+)
+
+
+def get_model(tier: str = DEFAULT_TIER) -> keras.Model:
     """
-    Preprocess video frames for OCEAN prediction.
+    Get or load the OCEAN prediction model for a tier.
+
+    Uses the model registry to avoid reloading the model on each call.
 
     Args:
-        frames: Input frames with shape (10, 112, 112, 3) or (batch, 10, 112, 112, 3).
-                Values can be in range [0, 255] or [0, 1].
+        tier: One of ``CONFIGURED_TIERS``.
 
     Returns:
-        Preprocessed frames with shape (batch, 10, 112, 112, 3) and values in [0, 1].
+        Loaded and ready-to-use Keras model.
 
     Raises:
-        ValueError: If frame shape is invalid.
+        ValueError: If the tier is not configured.
+        RuntimeError: If model cannot be loaded.
+    """
+    return _registry.get(tier)
+
+
+def build_serving_fn(
+    model: keras.Model,
+    input_shape: tuple[int, ...],
+    jit_compile: bool = False,
+) -> Callable:
     """
-    frames = frames.astype(np.float32)
+    Trace ``model`` once as a tf.function with a fixed float32 signature.
+
+    Args:
+        model: Keras model to serve.
+        input_shape: Input shape without the batch dimension.
+        jit_compile: Compile the traced graph with XLA.
+
+    Returns:
+        Function mapping a batch tensor to the model output tensor.
+    """
+    fn = tf.function(
+        lambda x: model(x, training=False),
+        input_signature=[tf.TensorSpec(shape=(None, *input_shape), dtype=tf.float32)],
+        jit_compile=jit_compile,
+    )
+    fn.get_concrete_function()
+    return fn
+
+
+def get_serving(tier: str = DEFAULT_TIER) -> ServingModel:
+    """
+    Get the head and serving function of a tier's model.
+
+    They are built (and traced) once per model version; a version pinned by
+    ``ModelRegistry.lease`` keeps its own while a newer one serves others.
+
+    Args:
+        tier: One of ``CONFIGURED_TIERS``.
+
+    Returns:
+        ``ServingModel`` for the model version this thread uses.
+    """
+    entry = _registry.entry(tier)
+    cached = _serving_instances.get(entry)
+    if cached is not None:
+        return cached
+
+    with _serving_lock:
+        cached = _serving_instances.get(entry)
+        if cached is None:
+            model = entry.model
+            head = build_head(model)
+            predict_embeddings = None
+            if COMPILED_SERVING:
+                predict_embeddings = build_serving_fn(
+                    head, (NUM_FRAMES, EMBEDDING_DIM), jit_compile=JIT_COMPILE
+                )
+            cached = ServingModel(entry.version, model, head, predict_embeddings)
+            _serving_instances[entry] = cached
+
+    return cached
+
+
+def get_head(tier: str = DEFAULT_TIER) -> keras.Model:
+    """
+    Get the embedding-to-OCEAN head of a tier's model.
+
+    Args:
+        tier: One of ``CONFIGURED_TIERS``.
+
+    Returns:
+        Keras model mapping (batch, 10, 256) embeddings to OCEAN scores.
+    """
+    return get_serving(tier).head
+
+
+def run_head(tier: str, embeddings: np.ndarray) -> np.ndarray:
+    """Score (batch, 10, 256) embeddings on a tier's head."""
+    serving = get_serving(tier)
+    if serving.predict_embeddings is None:
+        return serving.head.predict(embeddings, verbose=0)
+    return serving.predict_embeddings(tf.convert_to_tensor(embeddings, dtype=tf.float32)).numpy()
+
+
+def warm_up(tiers: Optional[list[str]] = None) -> None:
+    """
+    Load tiers and run their backbone and head once.
+
+    Moves model loading, tracing, backend compilation and (with XLA) head
+    compilation out of the first request.
+    """
+    for tier in tiers or CONFIGURED_TIERS:
+        start = time.perf_counter()
+        serving = get_serving(tier)
+        run_head(tier, np.zeros((1, NUM_FRAMES, EMBEDDING_DIM), dtype=np.float32))
+        frames = np.zeros((NUM_FRAMES, FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.float32)
+        embed_frames(frames, get_backbone(serving.model))
+        logger.info(f"Warmed up '{tier}' in {time.perf_counter() - start:.1f}s")
+
+
+def tier_cost(tier: str) -> tuple[int, int]:
+    """Sort key of a tier by cost: base tier order, then variants before the base."""
+    base, variant = split_tier(tier)
+    return list(MODEL_TIERS).index(base), 0 if variant else 1
+
+
+def cheapest_tier() -> str:
+    """Get the cheapest configured model tier."""
+    return min(CONFIGURED_TIERS, key=tier_cost)
+
+
+def is_cheaper(tier: str, than: str) -> bool:
+    """Whether ``tier`` is a cheaper model tier than ``than``."""
+    return tier_cost(tier) < tier_cost(than)
+
+
+def get_registry() -> ModelRegistry:
+    """Get the process-wide model registry."""
+    return _registry
+
+
+def get_feature_extractor():
+    """
+    Get or load the PolyFace feature extractor.
+
+    Returns:
+        PyTorch PolyFace model for feature extraction.
+    """
+    global _feature_extractor_instance
+
+    if _feature_extractor_instance is None:
+        with _feature_extractor_lock:
+            if _feature_extractor_instance is None:
+                _feature_extractor_instance = load_teacher().to(_device).eval()
+
+    return _feature_extractor_instance
+
+
+def get_backbone(model: keras.Model) -> torch.nn.Module:
+    """
+    Get the PyTorch PolyFace backbone wrapped inside an OCEAN model.
+
+    Falls back to the standalone feature extractor for models without a
+    PolyFace layer (e.g. the H5 fallback).
+
+    Args:
+        model: Full OCEAN model.
+
+    Returns:
+        PyTorch PolyFace backbone.
+    """
+    try:
+        return model.get_layer("polyface112").layer.polyface
+    except (ValueError, AttributeError):
+        return get_feature_extractor()
+
+
+def normalize_frames(frames: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert frames to float32 in [0, 1], accepting [0, 255] or [0, 1] input.
+
+    Writes into ``out`` (float32, same shape) when given instead of allocating.
+    """
+    if out is None:
+        out = np.empty(frames.shape, dtype=np.float32)
 
-    # Normalize to [0, 1] if needed
     if frames.max() > 1.0:
-        frames = frames / 255.0
+        np.divide(frames, np.float32(255.0), out=out, dtype=np.float32, casting="unsafe")
+    else:
+        np.copyto(out, frames, casting="unsafe")
+
+    return out
 
+
+def _batch_view(frames: np.ndarray) -> np.ndarray:
+    """Validate frames and view them as (batch, 10, H, W, 3) without copying."""
     # Add batch dimension if needed
     if frames.ndim == 4:
-        frames = np.expand_dims(frames, axis=0)
+        frames = frames[None, ...]
     elif frames.ndim != 5:
         raise ValueError(
             f"Expected frames shape (10, 112, 112, 3) or (batch, 10, 112, 112, 3), "
@@ -297,12 +879,67 @@ def preprocess(frames: np.ndarray) -> np.ndarray:
     return frames
 
 
-def predict_ocean(frames: np.ndarray) -> dict[str, float]:
+def preprocess(frames: np.ndarray) -> np.ndarray:
+    """
+    Preprocess video frames for OCEAN prediction.
+
+    Args:
+        frames: Input frames with shape (10, 112, 112, 3) or (batch, 10, 112, 112, 3).
+                Values can be in range [0, 255] or [0, 1].
+
+    Returns:
+        Preprocessed frames with shape (batch, 10, 112, 112, 3) and values in [0, 1].
+
+    Raises:
+        ValueError: If frame shape is invalid.
+    """
+    return normalize_frames(_batch_view(frames))
+
+
+@contextmanager
+def _normalized(frames: np.ndarray) -> Iterator[np.ndarray]:
+    """``normalize_frames`` into an arena buffer that is returned on exit."""
+    with arena.borrow(frames.shape) as buf:
+        with stage_span("preprocess"):
+            normalized = normalize_frames(frames, out=buf.numpy())
+        yield normalized
+
+
+@contextmanager
+def _embedding_buffer(n_frames: int) -> Iterator[np.ndarray]:
+    """Arena buffer for ``embed_frames`` output, returned on exit."""
+    with arena.borrow((n_frames, EMBEDDING_DIM)) as buf:
+        yield buf.numpy()
+
+
+def format_scores(scores: np.ndarray) -> dict[str, float]:
+    """
+    Build the result dictionary for one set of sigmoid OCEAN outputs.
+
+    Args:
+        scores: Model outputs with shape (5,) in [0, 1].
+
+    Returns:
+        Dictionary mapping trait names to percentage scores (0-100).
+    """
+    return {
+        trait: round(float(score) * 100, 2)
+        for trait, score in zip(OCEAN_TRAITS, scores)
+    }
+
+
+def predict_ocean(
+    frames: np.ndarray,
+    tier: str = DEFAULT_TIER,
+    tta: bool = False,
+) -> dict[str, float]:
     """
     Predict OCEAN personality traits from video frames.
 
     Args:
         frames: Video frames with shape (10, 112, 112, 3) or (batch, 10, 112, 112, 3).
+        tier: Model tier to run, one of ``CONFIGURED_TIERS``.
+        tta: Use flip test-time augmentation (see ``embed_frames``).
 
     Returns:
         Dictionary mapping trait names to percentage scores (0-100).
@@ -310,66 +947,432 @@ def predict_ocean(frames: np.ndarray) -> dict[str, float]:
     Raises:
         RuntimeError: If prediction fails.
     """
-    model = get_model()
-
-    if model is None:
-        raise RuntimeError("Model is not loaded")
-
-    # Preprocess frames
-    frames_tensor = preprocess(frames)
+    frames = _batch_view(frames)
 
     # Run prediction
+    start = time.perf_counter()
     try:
-        predictions = model.predict(frames_tensor, verbose=0)
+        with _registry.lease(tier), _normalized(frames) as frames_tensor:
+            batch = frames_tensor.shape[0]
+            with _embedding_buffer(batch * NUM_FRAMES) as out:
+                with stage_span("backbone"):
+                    embeddings = embed_frames(
+                        frames_tensor.reshape(-1, *frames_tensor.shape[2:]),
+                        get_backbone(get_model(tier)),
+                        tta=tta,
+                        out=out,
+                    )
+                with stage_span("head"):
+                    predictions = run_head(tier, embeddings.reshape(batch, NUM_FRAMES, -1))
     except Exception as e:
         raise RuntimeError(f"Prediction failed: {e}") from e
+    _registry.record_latency(tier, time.perf_counter() - start)
 
     if predictions is None or len(predictions) == 0:
         raise RuntimeError("Model returned empty predictions")
 
     # Extract first batch result
-    scores = predictions[0]
+    result = format_scores(predictions[0])
 
-    # Build result dictionary with percentage scores
-    result = {
-        trait: round(score * 100, 2)
-        for trait, score in zip(OCEAN_TRAITS, scores)
+    logger.debug(f"OCEAN predictions: {result}")
+
+    return result
+
+
+def predict_ocean_reduced(
+    frames: np.ndarray,
+    tier: str = DEFAULT_TIER,
+    tta: bool = False,
+) -> dict[str, float]:
+    """
+    Predict OCEAN traits from fewer than 10 sampled frames.
+
+    Each frame is embedded once and its embedding is repeated to fill the
+    10-step sequence, so backbone cost scales with the number of frames.
+
+    Args:
+        frames: Video frames with shape (k, 112, 112, 3), 1 <= k <= 10.
+        tier: Model tier to run, one of ``CONFIGURED_TIERS``.
+        tta: Use flip test-time augmentation (see ``embed_frames``).
+
+    Returns:
+        Dictionary mapping trait names to percentage scores (0-100).
+
+    Raises:
+        ValueError: If the number of frames is not between 1 and 10.
+        RuntimeError: If prediction fails.
+    """
+    n_frames = frames.shape[0]
+    if frames.ndim != 4 or not 1 <= n_frames <= NUM_FRAMES:
+        raise ValueError(f"Expected (1-{NUM_FRAMES}, 112, 112, 3) frames, got {frames.shape}")
+
+    start = time.perf_counter()
+    try:
+        with _registry.lease(tier), _normalized(frames) as frames:
+            with _embedding_buffer(n_frames) as out:
+                with stage_span("backbone"):
+                    backbone = get_backbone(get_model(tier))
+                    embeddings = embed_frames(frames, backbone, tta=tta, out=out)
+                positions = np.arange(NUM_FRAMES) * n_frames // NUM_FRAMES
+                with stage_span("head"):
+                    predictions = run_head(tier, embeddings[positions][None, ...])
+    except Exception as e:
+        raise RuntimeError(f"Prediction failed: {e}") from e
+    _registry.record_latency(tier, time.perf_counter() - start)
+
+    return format_scores(predictions[0])
+
+
+def predict_ocean_windows(
+    frames: np.ndarray,
+    windows: np.ndarray,
+    tier: str = DEFAULT_TIER,
+    tta: bool = False,
+) -> dict:
+    """
+    Predict OCEAN traits over several (possibly overlapping) 10-frame windows.
+
+    Every distinct frame is embedded once; the windows then gather their
+    embeddings and the head scores all of them in one (K, 10, 256) batch.
+
+    Args:
+        frames: Distinct video frames with shape (N, 112, 112, 3).
+        windows: Indices into ``frames`` with shape (K, 10).
+        tier: Model tier to run, one of ``CONFIGURED_TIERS``.
+        tta: Use flip test-time augmentation (see ``embed_frames``).
+
+    Returns:
+        Dictionary with the mean ``scores`` over windows, the per-trait
+        ``spread`` (standard deviation in percentage points), the per-trait
+        ``confidence`` (fraction of windows whose level matches the level
+        of the mean score) and the number of ``windows``.
+
+    Raises:
+        ValueError: If ``windows`` does not have shape (K, 10).
+        RuntimeError: If prediction fails.
+    """
+    if windows.ndim != 2 or windows.shape[1] != NUM_FRAMES:
+        raise ValueError(f"Expected windows shape (K, {NUM_FRAMES}), got {windows.shape}")
+
+    start = time.perf_counter()
+    try:
+        with _registry.lease(tier), _normalized(frames) as frames:
+            with _embedding_buffer(frames.shape[0]) as out:
+                with stage_span("backbone"):
+                    backbone = get_backbone(get_model(tier))
+                    embeddings = embed_frames(frames, backbone, tta=tta, out=out)
+                with stage_span("head"):
+                    predictions = run_head(tier, embeddings[windows])
+    except Exception as e:
+        raise RuntimeError(f"Prediction failed: {e}") from e
+    _registry.record_latency(tier, time.perf_counter() - start)
+
+    percent = predictions * 100
+    scores = format_scores(predictions.mean(axis=0))
+
+    return {
+        "scores": scores,
+        "spread": {
+            trait: round(float(std), 2)
+            for trait, std in zip(OCEAN_TRAITS, percent.std(axis=0))
+        },
+        "confidence": {
+            trait: round(
+                float(np.mean([get_level(p) == get_level(scores[trait]) for p in percent[:, i]])), 2
+            )
+            for i, trait in enumerate(OCEAN_TRAITS)
+        },
+        "windows": int(windows.shape[0]),
     }
 
-    logger.debug(f"OCEAN predictions: {result}")
 
-    # Clean up to free memory (optional - uncomment if memory is an issue)
-    # clear_model_cache()
+def mc_dropout(
+    head: keras.Model,
+    embeddings: np.ndarray,
+    samples: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Monte-Carlo dropout over the OCEAN head in one batched call.
 
-    return result
+    The embeddings are tiled ``samples`` times along the batch and the head
+    runs with its Dropout layers active, so the backbone is never repeated.
+
+    Args:
+        head: Model from ``build_head``.
+        embeddings: Clip embeddings with shape (B, 10, 256).
+        samples: Number of dropout samples per clip.
+
+    Returns:
+        Tuple of per-clip mean and standard deviation, each (B, 5) in [0, 1].
+    """
+    batch = embeddings.shape[0]
+    tiled = np.tile(embeddings, (samples, 1, 1))
+
+    outputs = head(tiled, training=True).numpy().reshape(samples, batch, -1)
+    return outputs.mean(axis=0), outputs.std(axis=0)
+
+
+def predict_ocean_uncertainty(
+    frames: np.ndarray,
+    tier: str = DEFAULT_TIER,
+    samples: int = 20,
+    tta: bool = False,
+) -> dict:
+    """
+    Predict OCEAN traits with a Monte-Carlo dropout confidence band.
+
+    Args:
+        frames: Video frames with shape (10, 112, 112, 3).
+        tier: Model tier to run, one of ``CONFIGURED_TIERS``.
+        samples: Number of dropout samples.
+        tta: Use flip test-time augmentation (see ``embed_frames``).
+
+    Returns:
+        Dictionary with deterministic ``scores`` and the MC-dropout ``mean``
+        and ``std`` per trait, all in percentage points, plus ``samples``.
+
+    Raises:
+        RuntimeError: If prediction fails.
+    """
+    frames = _batch_view(frames)[0]
+
+    start = time.perf_counter()
+    try:
+        with _registry.lease(tier), _normalized(frames) as frames:
+            with _embedding_buffer(NUM_FRAMES) as out:
+                head = get_head(tier)
+                backbone = get_backbone(get_model(tier))
+                with stage_span("backbone"):
+                    embeddings = embed_frames(frames, backbone, tta=tta, out=out)[None, ...]
+                with stage_span("head"):
+                    predictions = run_head(tier, embeddings)
+                    mean, std = mc_dropout(head, embeddings, samples)
+    except Exception as e:
+        raise RuntimeError(f"Prediction failed: {e}") from e
+    _registry.record_latency(tier, time.perf_counter() - start)
+
+    return {
+        "scores": format_scores(predictions[0]),
+        "mean": format_scores(mean[0]),
+        "std": format_scores(std[0]),
+        "samples": samples,
+    }
+
+
+def uncertain_traits(
+    scores: dict[str, float],
+    std: dict[str, float],
+    margin: float,
+    max_spread: float,
+) -> list[str]:
+    """
+    Find traits whose level label may differ on a deeper model.
+
+    A trait is uncertain when its score is within ``margin`` points of a
+    level threshold or its MC-dropout spread exceeds ``max_spread`` points.
+    """
+    thresholds = (MEDIUM_THRESHOLD, HIGH_THRESHOLD)
+    return [
+        trait
+        for trait in OCEAN_TRAITS
+        if std[trait] > max_spread or min(abs(scores[trait] - t) for t in thresholds) < margin
+    ]
+
+
+def predict_ocean_cascade(
+    frames: np.ndarray,
+    cheap_tier: str,
+    full_tier: str,
+    margin: float = 5.0,
+    max_spread: float = 5.0,
+    samples: int = 10,
+    tta: bool = False,
+) -> dict:
+    """
+    Score on a cheap tier and escalate to the full tier only when uncertain.
+
+    Args:
+        frames: Video frames with shape (10, 112, 112, 3).
+        cheap_tier: Tier that scores every request.
+        full_tier: Tier run when the cheap result is uncertain.
+        margin: Distance in points to a level threshold that counts as uncertain.
+        max_spread: MC-dropout std in points that counts as uncertain.
+        samples: MC-dropout samples on the cheap tier.
+        tta: Use flip test-time augmentation on both tiers.
+
+    Returns:
+        Dictionary with ``scores``, the ``tier`` that produced them, whether
+        the request ``escalated`` and the ``uncertain_traits`` that caused it.
+
+    Raises:
+        RuntimeError: If prediction fails.
+    """
+    cheap = predict_ocean_uncertainty(frames, tier=cheap_tier, samples=samples, tta=tta)
+    uncertain = uncertain_traits(cheap["scores"], cheap["std"], margin, max_spread)
+
+    with _cascade_lock:
+        _cascade_counts["requests"] += 1
+        _cascade_counts["escalated"] += bool(uncertain)
+
+    if not uncertain:
+        return {
+            "scores": cheap["scores"],
+            "tier": cheap_tier,
+            "escalated": False,
+            "uncertain_traits": [],
+        }
+
+    return {
+        "scores": predict_ocean(frames, tier=full_tier, tta=tta),
+        "tier": full_tier,
+        "escalated": True,
+        "uncertain_traits": uncertain,
+    }
+
+
+def cascade_stats() -> dict:
+    """Cascade request and escalation counts since startup."""
+    with _cascade_lock:
+        counts = dict(_cascade_counts)
+    counts["escalation_rate"] = (
+        round(counts["escalated"] / counts["requests"], 4) if counts["requests"] else None
+    )
+    return counts
+
+
+def _stage_chunks(
+    frames_nhwc: np.ndarray,
+    chunk_size: int,
+    buffers: list[torch.Tensor],
+    free: queue.Queue,
+    ready: queue.Queue,
+) -> None:
+    """Prefetch thread: convert chunks to NCHW float into free staging buffers."""
+    try:
+        for i in range(0, frames_nhwc.shape[0], chunk_size):
+            chunk = torch.from_numpy(frames_nhwc[i : i + chunk_size]).permute(0, 3, 1, 2)
+            slot = free.get()
+            if slot is None:
+                return
+            buffers[slot][: len(chunk)].copy_(chunk)
+            ready.put((i, len(chunk), slot))
+    except Exception as e:
+        ready.put(e)
+        return
+    ready.put(None)
 
 
 def torch_forward_frames(
     frames_nhwc: np.ndarray,
     model: torch.nn.Module,
     device: torch.device,
-    chunk_size: int = 64,
+    chunk_size: int = CHUNK_SIZE,
+    out: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     """
     Forward frames through a PyTorch model in chunks.
 
+    With more than one chunk, a prefetch thread converts chunk i+1 into one
+    of two reused (pinned, on CUDA) staging buffers while the model runs on
+    chunk i, and each result is copied straight into the output array
+    instead of being concatenated at the end.
+
     Args:
         frames_nhwc: Frames in NHWC format.
         model: PyTorch model.
         device: Device to run on.
         chunk_size: Number of frames per batch.
+        out: Preallocated float32 output with one row per frame. Allocated
+             after the first chunk when omitted.
 
     Returns:
-        Model outputs as numpy array.
+        Model outputs as numpy array (``out`` when given).
     """
     n_frames = frames_nhwc.shape[0]
-    outputs = []
+
+    def forward(x: torch.Tensor, start: int) -> None:
+        nonlocal out
+        y = model(x.to(device, non_blocking=True)).detach()
+        if out is None:
+            out = np.empty((n_frames, *y.shape[1:]), dtype=np.float32)
+        torch.from_numpy(out[start : start + len(y)]).copy_(y)
 
     with torch.no_grad():
-        for i in range(0, n_frames, chunk_size):
+        if n_frames <= chunk_size:
+            forward(torch.from_numpy(frames_nhwc).permute(0, 3, 1, 2).float(), 0)
+            return out
+
+        pin = device.type == "cuda"
+        shape = (chunk_size, frames_nhwc.shape[3], *frames_nhwc.shape[1:3])
+        buffers = [arena.acquire(shape, pin=pin) for _ in range(2)]
+        free, ready = queue.Queue(), queue.Queue()
+        for slot in range(len(buffers)):
+            free.put(slot)
+
+        stager = threading.Thread(
+            target=_stage_chunks,
+            args=(frames_nhwc, chunk_size, buffers, free, ready),
+            daemon=True,
+        )
+        stager.start()
+        try:
+            while (item := ready.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                start, n, slot = item
+                forward(buffers[slot][:n], start)
+                # The result is on the host, so the staging buffer is no longer read
+                free.put(slot)
+        finally:
+            free.put(None)
+            stager.join()
+            for buffer in buffers:
+                arena.release(buffer)
+
+    return out
+
+
+def embed_frames(
+    frames_nhwc: np.ndarray,
+    backbone: torch.nn.Module,
+    chunk_size: int = CHUNK_SIZE,
+    tta: bool = False,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Compute PolyFace embeddings for individual frames.
+
+    Frames are fed exactly as the Keras PolyFace layer feeds them, so the
+    embeddings can be passed straight to ``build_head`` models.
+
+    Args:
+        frames_nhwc: Preprocessed frames with shape (N, 112, 112, 3).
+        backbone: PyTorch PolyFace backbone.
+        chunk_size: Number of frames per batch.
+        tta: Average each embedding with that of the horizontally flipped
+             frame. Original and flipped frames share one forward pass.
+        out: Preallocated (N, 256) float32 output.
+
+    Returns:
+        Embeddings with shape (N, 256).
+    """
+    device = next(backbone.parameters()).device
+    BATCH_FRAMES.observe(frames_nhwc.shape[0])
+
+    if not tta:
+        return torch_forward_frames(frames_nhwc, backbone, device, chunk_size=chunk_size, out=out)
+
+    if out is None:
+        out = np.empty((frames_nhwc.shape[0], EMBEDDING_DIM), dtype=np.float32)
+    with torch.no_grad():
+        for i in range(0, frames_nhwc.shape[0], chunk_size):
             chunk = frames_nhwc[i : i + chunk_size]
-            x = torch.from_numpy(chunk).permute(0, 3, 1, 2).float().to(device)
-            out = model(x)
-            outputs.append(out.detach().cpu().numpy())
+            n = chunk.shape[0]
+            x = torch.from_numpy(chunk).permute(0, 3, 1, 2).float()
+            x = torch.cat((x, x), 0).to(device)
+
+            y = backbone(x, flip=[False] * n + [True] * n)
+            y = torch.nn.functional.normalize(y[:n] + y[n:], p=2, dim=1)
+            torch.from_numpy(out[i : i + n]).copy_(y)
 
-    return np.concatenate(outputs, axis=0)
+    return out
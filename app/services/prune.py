@@ -0,0 +1,305 @@
+"""
+Structured Channel Pruning of PolyFace Blocks
+
+Prunes the branch channels inside BlockA/B/C. The residual stream
+(384/1152/2048 channels) is left untouched, so each block stays
+shape-compatible with its neighbours. For every ``BasicConv2d`` inside a
+branch, the weakest output channels are removed. The same input channels
+are then removed from the consumer: the next conv of the branch, or the
+block's 1x1 ``stem`` conv at the channel's concat offset.
+
+The pruned architecture is described by a spec mapping each conv name to
+its output width, so it can be rebuilt with ``apply_spec`` and loaded.
+"""
+
+import copy
+import logging
+from typing import Callable, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .polyfacemodels2 import BasicConv2d, BlockA, BlockB, BlockC
+
+logger = logging.getLogger(__name__)
+
+# Never prune a conv below this many output channels
+MIN_CHANNELS = 8
+
+
+# =============================================================================
+# Layer surgery
+# =============================================================================
+
+def _branches(block: nn.Module) -> list[list[tuple[str, BasicConv2d]]]:
+    """List the BasicConv2d layers of each branch of a block, in concat order."""
+    names = ["branch0", "branch1"]
+    if isinstance(block, BlockA):
+        names.append("branch2")
+    branches = []
+    for name in names:
+        branch = getattr(block, name)
+        if isinstance(branch, BasicConv2d):
+            branches.append([(name, branch)])
+        else:
+            branches.append([(f"{name}.{i}", m) for i, m in enumerate(branch)])
+    return branches
+
+
+def _shrink_bn(bn: nn.BatchNorm2d, keep: torch.Tensor) -> None:
+    bn.weight.data = bn.weight.data[keep].clone()
+    bn.bias.data = bn.bias.data[keep].clone()
+    bn.running_mean = bn.running_mean[keep].clone()
+    bn.running_var = bn.running_var[keep].clone()
+    bn.num_features = len(keep)
+
+
+def _shrink_out(layer: BasicConv2d, keep: torch.Tensor) -> None:
+    layer.conv.weight.data = layer.conv.weight.data[keep].clone()
+    layer.conv.out_channels = len(keep)
+    _shrink_bn(layer.bn, keep)
+
+
+def _shrink_in(conv: nn.Conv2d, keep: torch.Tensor) -> None:
+    conv.weight.data = conv.weight.data[:, keep].clone()
+    conv.in_channels = len(keep)
+
+
+def _compensate(
+    layer: BasicConv2d,
+    dropped: torch.Tensor,
+    consumer: nn.Conv2d,
+    consumer_bn: nn.BatchNorm2d,
+    offset: int,
+) -> None:
+    """
+    Fold the constant output of dropped channels into the consumer's BN.
+
+    A channel with a small BN gamma outputs roughly ``relu(beta)`` everywhere.
+    Its contribution to the consumer is then a per-channel constant, which
+    is subtracted from the consumer BN's running mean instead.
+    """
+    if len(dropped) == 0:
+        return
+
+    constant = torch.relu(layer.bn.bias.data[dropped])
+    weight = consumer.weight.data[:, offset + dropped].sum(dim=(2, 3))
+    consumer_bn.running_mean -= weight @ constant
+
+
+def _prune_block(
+    block: nn.Module,
+    prefix: str,
+    select: Callable[[str, BasicConv2d], torch.Tensor],
+    compensate: bool = True,
+) -> dict[str, int]:
+    """
+    Prune one Inception-ResNet block in place.
+
+    Args:
+        block: BlockA, BlockB or BlockC.
+        prefix: Module name of ``block``, used for spec keys.
+        select: Returns the sorted output channel indices to keep for a conv.
+        compensate: Fold dropped channels into the consumer BN.
+
+    Returns:
+        Spec entries ``{conv name: kept output channels}``.
+    """
+    spec = {}
+    stem_conv, stem_bn = block.stem[0], block.stem[1]
+    stem_keep = []
+    offset = 0
+
+    for branch in _branches(block):
+        for i, (name, layer) in enumerate(branch):
+            full = layer.conv.out_channels
+            keep = select(f"{prefix}.{name}", layer)
+            dropped = torch.tensor(
+                sorted(set(range(full)) - set(keep.tolist())), dtype=torch.long
+            )
+
+            last = i == len(branch) - 1
+            if last:
+                consumer, consumer_bn, consumer_offset = stem_conv, stem_bn, offset
+            else:
+                following = branch[i + 1][1]
+                consumer, consumer_bn, consumer_offset = following.conv, following.bn, 0
+
+            if compensate:
+                _compensate(layer, dropped, consumer, consumer_bn, consumer_offset)
+
+            _shrink_out(layer, keep)
+            if last:
+                stem_keep.append(keep + offset)
+                offset += full
+            else:
+                _shrink_in(consumer, keep)
+
+            spec[f"{prefix}.{name}"] = len(keep)
+
+    _shrink_in(stem_conv, torch.cat(stem_keep))
+    return spec
+
+
+def _blocks(polyface: nn.Module):
+    """Yield ``(name, block)`` for every BlockA/B/C of a PolyFace backbone."""
+    for name, module in polyface.named_modules():
+        if isinstance(module, (BlockA, BlockB, BlockC)):
+            yield name, module
+
+
+# =============================================================================
+# Channel ranking
+# =============================================================================
+
+def bn_gamma_scores(layer: BasicConv2d) -> torch.Tensor:
+    """Channel importance as BN gamma magnitude."""
+    return layer.bn.weight.data.abs()
+
+
+def activation_scores(polyface: nn.Module, frames_nhwc: np.ndarray) -> dict[str, torch.Tensor]:
+    """
+    Channel importance as mean post-ReLU activation over calibration frames.
+
+    Returns:
+        Mapping of BasicConv2d name to per-channel mean activation.
+    """
+    stats: dict[str, torch.Tensor] = {}
+    handles = []
+
+    for block_name, block in _blocks(polyface):
+        for branch in _branches(block):
+            for name, layer in branch:
+                key = f"{block_name}.{name}"
+
+                def hook(_, __, output, key=key):
+                    value = output.detach().abs().mean(dim=(0, 2, 3)).cpu()
+                    stats[key] = stats.get(key, 0) + value
+
+                handles.append(layer.register_forward_hook(hook))
+
+    try:
+        device = next(polyface.parameters()).device
+        with torch.no_grad():
+            x = torch.from_numpy(frames_nhwc).permute(0, 3, 1, 2).float().to(device)
+            polyface(x)
+    finally:
+        for handle in handles:
+            handle.remove()
+
+    return stats
+
+
+# =============================================================================
+# Public API
+# =============================================================================
+
+def prune_model(
+    polyface: nn.Module,
+    ratio: float,
+    criterion: str = "bn",
+    frames_nhwc: Optional[np.ndarray] = None,
+) -> dict:
+    """
+    Prune ``ratio`` of the branch channels of every block in place.
+
+    Args:
+        polyface: PolyFace backbone in eval mode.
+        ratio: Fraction of each branch conv's output channels to remove.
+        criterion: "bn" (BN gamma magnitude) or "activation" (mean activation
+                   over ``frames_nhwc``).
+        frames_nhwc: Calibration frames, required for "activation".
+
+    Returns:
+        Architecture spec ``{"channels": {conv name: width}}``.
+
+    Raises:
+        ValueError: If the criterion is unknown or frames are missing.
+    """
+    if criterion == "activation":
+        if frames_nhwc is None:
+            raise ValueError("Activation criterion needs calibration frames")
+        scores = activation_scores(polyface, frames_nhwc)
+        score_fn = lambda name, layer: scores[name]
+    elif criterion == "bn":
+        score_fn = lambda name, layer: bn_gamma_scores(layer)
+    else:
+        raise ValueError(f"Unknown pruning criterion: {criterion}")
+
+    def select(name: str, layer: BasicConv2d) -> torch.Tensor:
+        full = layer.conv.out_channels
+        n_keep = max(min(MIN_CHANNELS, full), int(round(full * (1 - ratio))))
+        keep = torch.argsort(score_fn(name, layer), descending=True)[:n_keep]
+        return torch.sort(keep).values
+
+    channels = {}
+    for name, block in _blocks(polyface):
+        channels.update(_prune_block(block, name, select))
+
+    return {"channels": channels}
+
+
+def apply_spec(polyface: nn.Module, spec: dict) -> nn.Module:
+    """
+    Reshape an unpruned backbone to a pruned architecture spec in place.
+
+    Weights are placeholders; load the pruned state dict afterwards.
+    """
+    channels = spec["channels"]
+
+    def select(name: str, layer: BasicConv2d) -> torch.Tensor:
+        return torch.arange(channels.get(name, layer.conv.out_channels))
+
+    for name, block in _blocks(polyface):
+        _prune_block(block, name, select, compensate=False)
+
+    return polyface
+
+
+def save_pruned(polyface: nn.Module, spec: dict, tier: str, path: str) -> None:
+    """Save a pruned backbone with its architecture spec."""
+    torch.save({"tier": tier, "spec": spec, "state_dict": polyface.state_dict()}, path)
+    logger.info(f"Pruned '{tier}' backbone saved to {path}")
+
+
+def load_pruned(polyface: nn.Module, path: str) -> nn.Module:
+    """Rebuild ``polyface`` (a fresh backbone of the saved tier) from a pruned artifact."""
+    artifact = torch.load(path, map_location="cpu")
+    apply_spec(polyface, artifact["spec"])
+    polyface.load_state_dict(artifact["state_dict"])
+    return polyface
+
+
+def count_flops(polyface: nn.Module, frame_size: tuple[int, int] = (112, 112)) -> int:
+    """Count multiply-accumulate FLOPs (x2) of conv and linear layers for one frame."""
+    total = [0]
+    handles = []
+
+    def conv_hook(module, _, output):
+        kh, kw = module.kernel_size
+        total[0] += 2 * output[0].numel() * module.in_channels // module.groups * kh * kw
+
+    def linear_hook(module, _, output):
+        total[0] += 2 * module.in_features * module.out_features
+
+    for module in polyface.modules():
+        if isinstance(module, nn.Conv2d):
+            handles.append(module.register_forward_hook(conv_hook))
+        elif isinstance(module, nn.Linear):
+            handles.append(module.register_forward_hook(linear_hook))
+
+    try:
+        device = next(polyface.parameters()).device
+        with torch.no_grad():
+            polyface(torch.zeros(1, 3, frame_size[1], frame_size[0], device=device))
+    finally:
+        for handle in handles:
+            handle.remove()
+
+    return total[0]
+
+
+def clone_backbone(polyface: nn.Module) -> nn.Module:
+    """Deep copy a backbone, e.g. to keep the unpruned teacher."""
+    return copy.deepcopy(polyface)
@@ -0,0 +1,422 @@
+"""
+Model Registry
+
+Keeps loaded OCEAN models keyed by tier, tracks inference latency per tier
+and swaps tiers to new artifact versions without a restart.
+
+Loading is single-flight per tier: concurrent first requests wait for one
+load instead of building the model twice. A swap loads the new version next
+to the old one and publishes it atomically. Requests holding a ``lease`` keep
+the version they started with, and the old version is released once its
+last lease ends.
+
+With a memory budget, the registry is an LRU cache: loading a model that
+would exceed the budget evicts the least recently used unleased models,
+which are reloaded on their next use.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1000
+
+
+@dataclass(eq=False)
+class ModelVersion:
+    """One loaded version of a tier's model."""
+
+    tier: str
+    version: str
+    model: Any
+    loaded_at: float
+    load_seconds: float
+    nbytes: int = 0
+    leases: int = 0
+    retired: bool = False
+
+
+class ModelRegistry:
+    """
+    Registry of loaded models, one current version per tier.
+
+    Models are loaded on first use with ``loader(tier)``. ``version_fn(tier)``
+    identifies the artifact version a load would produce; ``reload`` and
+    ``watch`` swap a tier when it changes. ``on_release(entry)`` is called
+    when a retired version has drained.
+
+    When ``budget_bytes`` is set, ``size_fn(model)`` measures each load and
+    least recently used models are evicted to stay within the budget.
+    ``on_evict(entry)`` runs before an evicted model is released, e.g. to
+    spill weights that a reload cannot recreate.
+
+    ``on_load(entry)`` is called after every load, e.g. to export load times.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        tiers: list[str],
+        version_fn: Optional[Callable[[str], str]] = None,
+        on_release: Optional[Callable[[ModelVersion], None]] = None,
+        budget_bytes: int = 0,
+        size_fn: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[ModelVersion], None]] = None,
+        on_load: Optional[Callable[[ModelVersion], None]] = None,
+    ):
+        self._loader = loader
+        self._version_fn = version_fn or (lambda tier: "unversioned")
+        self._on_release = on_release
+        self._size_fn = size_fn or (lambda model: 0)
+        self._on_evict = on_evict
+        self._on_load = on_load
+        self.budget_bytes = budget_bytes
+        self.tiers = list(tiers)
+
+        self._lock = threading.Lock()
+        self._load_locks = {tier: threading.Lock() for tier in self.tiers}
+        # Least recently used first
+        self._entries: OrderedDict[str, ModelVersion] = OrderedDict()
+        self._draining: set[ModelVersion] = set()
+        self._local = threading.local()
+        self._watcher: Optional[threading.Thread] = None
+        self._swaps = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._latency: dict[str, deque] = {
+            tier: deque(maxlen=LATENCY_WINDOW) for tier in self.tiers
+        }
+
+    # -------------------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------------------
+
+    def _check(self, tier: str) -> None:
+        if tier not in self.tiers:
+            raise ValueError(f"Model tier '{tier}' is not configured. Available: {self.tiers}")
+
+    def _load(self, tier: str) -> ModelVersion:
+        version = self._version_fn(tier)
+        logger.info(f"Loading '{tier}' model tier (version {version})...")
+
+        start = time.perf_counter()
+        model = self._loader(tier)
+        seconds = time.perf_counter() - start
+        entry = ModelVersion(tier, version, model, time.time(), seconds, self._size_fn(model))
+        if self._on_load is not None:
+            self._on_load(entry)
+        return entry
+
+    def _publish(self, entry: ModelVersion) -> Optional[ModelVersion]:
+        """Make ``entry`` current and enforce the budget. Returns the entry it replaced."""
+        with self._lock:
+            old = self._entries.pop(entry.tier, None)
+            self._entries[entry.tier] = entry
+            evicted = self._over_budget(keep=entry.tier)
+
+        for victim in evicted:
+            self._evict(victim)
+        return old
+
+    def _over_budget(self, keep: str) -> list[ModelVersion]:
+        """
+        Remove least recently used unleased entries until within budget.
+
+        Caller holds the lock. Leased entries are skipped, so the budget can be
+        exceeded while every model is in use.
+        """
+        if not self.budget_bytes:
+            return []
+
+        used = sum(e.nbytes for e in self._entries.values())
+        used += sum(e.nbytes for e in self._draining)
+        evicted = []
+        for tier, entry in list(self._entries.items()):
+            if used <= self.budget_bytes:
+                break
+            if tier == keep or entry.leases:
+                continue
+            del self._entries[tier]
+            entry.retired = True
+            used -= entry.nbytes
+            evicted.append(entry)
+
+        if used > self.budget_bytes:
+            logger.warning(
+                f"Model memory {used / 2**20:.0f} MiB exceeds budget "
+                f"{self.budget_bytes / 2**20:.0f} MiB; all other models are in use"
+            )
+        return evicted
+
+    def _evict(self, entry: ModelVersion, drained: bool = True) -> None:
+        """Spill an evicted entry and release it, or leave it draining if still leased."""
+        with self._lock:
+            self._evictions += 1
+
+        logger.info(f"Evicting '{entry.tier}' model ({entry.nbytes / 2**20:.0f} MiB)")
+        if self._on_evict is not None:
+            try:
+                self._on_evict(entry)
+            except Exception as e:
+                logger.error(f"Failed to spill '{entry.tier}' model before eviction: {e}")
+        if drained:
+            self._release(entry)
+
+    def entry(self, tier: str) -> ModelVersion:
+        """
+        Get the version of ``tier`` this thread should use, loading it if needed.
+
+        Returns the version pinned by an enclosing ``lease``, else the
+        current one.
+
+        Raises:
+            ValueError: If the tier is not configured.
+        """
+        self._check(tier)
+
+        pinned = getattr(self._local, "pinned", {}).get(tier)
+        if pinned is not None:
+            return pinned
+
+        with self._lock:
+            entry = self._entries.get(tier)
+            if entry is not None:
+                self._hits += 1
+                self._entries.move_to_end(tier)
+                return entry
+
+        with self._load_locks[tier]:
+            entry = self._entries.get(tier)
+            if entry is None:
+                with self._lock:
+                    self._misses += 1
+                entry = self._load(tier)
+                self._publish(entry)
+
+        return entry
+
+    def get(self, tier: str) -> Any:
+        """
+        Get the model for ``tier``, loading it if needed.
+
+        Raises:
+            ValueError: If the tier is not configured.
+        """
+        return self.entry(tier).model
+
+    def version(self, tier: str) -> Optional[str]:
+        """Current version of a loaded tier, else None."""
+        entry = self._entries.get(tier)
+        return entry.version if entry else None
+
+    # -------------------------------------------------------------------------
+    # Leases and swapping
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def lease(self, *tiers: str) -> Iterator[dict[str, ModelVersion]]:
+        """
+        Pin the current version of ``tiers`` for the calling thread.
+
+        Inside the block, ``get`` and ``entry`` on this thread return the
+        pinned versions even if a swap happens, and a swapped-out version is
+        not released until every lease on it has ended. Nested leases reuse
+        the outer pin.
+
+        Yields:
+            Mapping of tier to its pinned ``ModelVersion``.
+        """
+        pinned = getattr(self._local, "pinned", None)
+        if pinned is None:
+            pinned = self._local.pinned = {}
+
+        acquired = []
+        try:
+            for tier in tiers:
+                if tier in pinned:
+                    continue
+                while True:
+                    entry = self.entry(tier)
+                    with self._lock:
+                        if not entry.retired:
+                            entry.leases += 1
+                            break
+                pinned[tier] = entry
+                acquired.append(entry)
+
+            yield {tier: pinned[tier] for tier in tiers}
+        finally:
+            for entry in acquired:
+                del pinned[entry.tier]
+                with self._lock:
+                    entry.leases -= 1
+                    drained = entry.retired and entry.leases == 0
+                if drained:
+                    self._release(entry)
+
+    def _retire(self, entry: ModelVersion) -> bool:
+        """Mark ``entry`` retired; caller holds the lock. Returns True if already drained."""
+        entry.retired = True
+        if entry.leases == 0:
+            return True
+        self._draining.add(entry)
+        return False
+
+    def _release(self, entry: ModelVersion) -> None:
+        with self._lock:
+            self._draining.discard(entry)
+
+        if self._on_release is not None:
+            self._on_release(entry)
+        logger.info(f"Released '{entry.tier}' model version {entry.version}")
+
+    def reload(self, tier: str, force: bool = False) -> dict:
+        """
+        Load the current artifact version of ``tier`` and swap it in.
+
+        The old version keeps serving while the new one loads. If loading
+        fails, the old version stays current and the error is raised.
+
+        Args:
+            tier: Configured tier to reload.
+            force: Reload even if the artifact version is unchanged.
+
+        Returns:
+            Dictionary with the new ``version``, the ``previous`` one and
+            whether the tier was ``swapped``.
+        """
+        self._check(tier)
+
+        with self._load_locks[tier]:
+            current = self._entries.get(tier)
+            previous = current.version if current else None
+            if current is not None and not force and self._version_fn(tier) == previous:
+                return {"version": previous, "previous": previous, "swapped": False}
+
+            entry = self._load(tier)
+            old = self._publish(entry)
+            with self._lock:
+                self._swaps += 1
+                drained = old is not None and self._retire(old)
+
+        if drained:
+            self._release(old)
+
+        logger.info(f"Swapped '{tier}' model: {previous} -> {entry.version}")
+        return {"version": entry.version, "previous": previous, "swapped": True}
+
+    def watch(self, interval: float) -> None:
+        """
+        Reload loaded tiers whenever their artifact version changes.
+
+        Polls every ``interval`` seconds in a daemon thread. Publish new
+        artifacts by writing them elsewhere and renaming them into place, so
+        a poll never sees a half-written file.
+        """
+        if self._watcher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                for tier in self.tiers:
+                    entry = self._entries.get(tier)
+                    if entry is None:
+                        continue
+                    try:
+                        if self._version_fn(tier) != entry.version:
+                            self.reload(tier)
+                    except Exception as e:
+                        logger.error(f"Hot reload of '{tier}' failed: {e}")
+
+        self._watcher = threading.Thread(target=run, name="model-watch", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching model artifacts every {interval}s")
+
+    def evict(self, tier: Optional[str] = None) -> int:
+        """
+        Evict one tier, or every tier, as if over budget.
+
+        Evicted models are reloaded lazily on their next use. Leased models
+        are released once drained.
+
+        Returns:
+            Number of models evicted.
+        """
+        with self._lock:
+            tiers = [tier] if tier else list(self._entries)
+            entries = [self._entries.pop(t) for t in tiers if t in self._entries]
+            drained = [self._retire(entry) for entry in entries]
+
+        for entry, is_drained in zip(entries, drained):
+            self._evict(entry, drained=is_drained)
+        return len(entries)
+
+    def clear(self) -> None:
+        """Evict all loaded models."""
+        self.evict()
+
+    # -------------------------------------------------------------------------
+    # Statistics
+    # -------------------------------------------------------------------------
+
+    def record_latency(self, tier: str, seconds: float) -> None:
+        """Record the inference latency of one request served by ``tier``."""
+        self._latency.setdefault(tier, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def stats(self) -> dict[str, dict]:
+        """
+        Get load state, version and latency statistics per tier.
+
+        Returns:
+            Mapping of tier to ``loaded``, ``version``, ``load_seconds``,
+            ``leases``, ``draining`` (retired versions still leased),
+            ``count`` and mean/p50/p95 latency in milliseconds over the last
+            ``LATENCY_WINDOW`` requests.
+        """
+        with self._lock:
+            entries = dict(self._entries)
+            draining = [entry.tier for entry in self._draining]
+
+        result = {}
+        for tier in self.tiers:
+            entry = entries.get(tier)
+            samples = np.array(self._latency.get(tier, ()), dtype=np.float64) * 1000
+            result[tier] = {
+                "loaded": entry is not None,
+                "version": entry.version if entry else None,
+                "load_seconds": round(entry.load_seconds, 2) if entry else None,
+                "mib": round(entry.nbytes / 2**20, 1) if entry else None,
+                "leases": entry.leases if entry else 0,
+                "draining": draining.count(tier),
+                "count": int(samples.size),
+                "mean_ms": round(float(samples.mean()), 2) if samples.size else None,
+                "p50_ms": round(float(np.percentile(samples, 50)), 2) if samples.size else None,
+                "p95_ms": round(float(np.percentile(samples, 95)), 2) if samples.size else None,
+            }
+        return result
+
+    def cache_stats(self) -> dict:
+        """Memory use against the budget and hit/miss/eviction counters."""
+        with self._lock:
+            used = sum(e.nbytes for e in self._entries.values())
+            draining = sum(e.nbytes for e in self._draining)
+            return {
+                "budget_mib": round(self.budget_bytes / 2**20, 1) if self.budget_bytes else None,
+                "used_mib": round(used / 2**20, 1),
+                "draining_mib": round(draining / 2**20, 1),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "swaps": self._swaps,
+            }
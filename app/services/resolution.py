@@ -0,0 +1,105 @@
+"""
+Backbone Input Resolution
+
+Frames are extracted at 112x112, yet ``APolynet`` upsamples every frame to
+235x235 before the stem, so the backbone pays for 235² compute on 112²
+information. Two alternatives are supported:
+
+- native: the backbone runs at a smaller input size. The final 2048-channel
+  map shrinks below 6x6, so the ``get_fc_E`` Linear is rebuilt by average
+  pooling its weights to the new spatial grid, then fine-tuned against the
+  235 backbone.
+- direct: frames are decoded straight to 235x235 from the source video and
+  the backbone skips its own resize, so each frame is resized once.
+"""
+
+import logging
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+
+# Native APolynet input size and its final feature map
+FULL_SIZE = 235
+FULL_MAP = (6, 6)
+
+
+def feature_map_size(polyface: nn.Module, size: int) -> tuple[int, int]:
+    """Spatial size of the 2048-channel map fed to the FC head at input ``size``."""
+    net = polyface.backbone
+    device = next(polyface.parameters()).device
+
+    with torch.no_grad():
+        x = torch.zeros(1, 3, size, size, device=device)
+        for stage in (net.stem, net.a10, net.a2b, net.b20, net.b2c, net.c10):
+            x = stage(x)
+
+    return tuple(x.shape[2:])
+
+
+def pool_linear(
+    linear: nn.Linear,
+    channels: int,
+    src: tuple[int, int],
+    dst: tuple[int, int],
+) -> nn.Linear:
+    """
+    Shrink a Linear over a flattened (channels, H, W) map to a smaller grid.
+
+    The weights are average pooled per channel and rescaled by the area ratio,
+    so a spatially constant map produces the same output at both sizes.
+    """
+    weight = linear.weight.data.view(linear.out_features, channels, *src)
+    pooled = F.adaptive_avg_pool2d(weight, dst) * (src[0] * src[1]) / (dst[0] * dst[1])
+
+    resized = nn.Linear(channels * dst[0] * dst[1], linear.out_features)
+    resized.weight.data.copy_(pooled.reshape(linear.out_features, -1))
+    resized.bias.data.copy_(linear.bias.data)
+    return resized.to(linear.weight.device)
+
+
+def adapt_resolution(polyface: nn.Module, size: int) -> nn.Module:
+    """
+    Make a PolyFace backbone run natively at ``size`` x ``size`` in place.
+
+    Args:
+        polyface: PolyFace wrapper with a full-rank FC layer.
+        size: Backbone input size, at most 235.
+
+    Returns:
+        The same ``polyface`` module.
+
+    Raises:
+        ValueError: If the size is out of range or the FC is factorized.
+    """
+    if not 0 < size <= FULL_SIZE:
+        raise ValueError(f"Input size must be in 1-{FULL_SIZE}, got {size}")
+
+    head = polyface.backbone.fc
+    if not isinstance(head.fc, nn.Linear):
+        raise ValueError("Resolution must be adapted before factorizing the FC layer")
+
+    polyface.backbone.input_size = size
+    grid = feature_map_size(polyface, size)
+    if grid != FULL_MAP:
+        head.fc = pool_linear(head.fc, head.bn1.num_features, FULL_MAP, grid)
+
+    logger.info(f"Backbone input {size}x{size}, FC grid {FULL_MAP} -> {grid}")
+    return polyface
+
+
+def save_adapted(polyface: nn.Module, tier: str, path: str) -> None:
+    """Save a resolution-adapted backbone."""
+    size = polyface.backbone.input_size
+    torch.save({"tier": tier, "input_size": size, "state_dict": polyface.state_dict()}, path)
+    logger.info(f"Backbone for '{tier}' at {size}x{size} saved to {path}")
+
+
+def load_adapted(polyface: nn.Module, path: str) -> nn.Module:
+    """Rebuild ``polyface`` (a fresh backbone of the saved tier) from an adapted artifact."""
+    artifact = torch.load(path, map_location="cpu")
+    adapt_resolution(polyface, artifact["input_size"])
+    polyface.load_state_dict(artifact["state_dict"])
+    return polyface
@@ -0,0 +1,135 @@
+"""
+Live Streaming OCEAN Inference
+
+Keeps a ring buffer of the last 10 PolyFace embeddings per stream. Each
+incoming frame goes through the backbone exactly once; the LSTM head reruns
+over the buffer every ``update_every`` frames.
+
+Sessions live in the memory of one process: every chunk of a stream must
+reach the worker that opened it, so streaming runs with a single worker.
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from .predict import (
+    NUM_FRAMES,
+    embed_frames,
+    format_scores,
+    get_backbone,
+    get_model,
+    get_registry,
+    run_head,
+)
+
+
+class StreamSession:
+    """Rolling OCEAN scores for one live frame stream."""
+
+    def __init__(self, user_id: int, tier: str, update_every: int):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.tier = tier
+        self.update_every = max(1, update_every)
+
+        self.embeddings: deque = deque(maxlen=NUM_FRAMES)
+        self.frames_received = 0
+        self.scores: Optional[dict[str, float]] = None
+        self.last_seen = time.monotonic()
+
+        self._since_update = 0
+        self._lock = threading.Lock()
+
+    def push(self, frames: np.ndarray) -> bool:
+        """
+        Embed new frames into the ring buffer and rescore when due.
+
+        Args:
+            frames: New frames with shape (n, 112, 112, 3), float in [0, 1].
+
+        Returns:
+            True if ``scores`` were updated by this call.
+        """
+        with self._lock:
+            self.last_seen = time.monotonic()
+
+            with get_registry().lease(self.tier):
+                for embedding in embed_frames(frames, get_backbone(get_model(self.tier))):
+                    self.embeddings.append(embedding)
+                self.frames_received += len(frames)
+                self._since_update += len(frames)
+
+                if len(self.embeddings) < NUM_FRAMES or self._since_update < self.update_every:
+                    return False
+
+                predictions = run_head(self.tier, np.stack(self.embeddings)[None, ...])
+            self.scores = format_scores(predictions[0])
+            self._since_update = 0
+            return True
+
+    def state(self) -> dict:
+        return {
+            "session_id": self.id,
+            "tier": self.tier,
+            "frames_received": self.frames_received,
+            "buffered": len(self.embeddings),
+            "window": NUM_FRAMES,
+            "update_every": self.update_every,
+            "scores": self.scores,
+        }
+
+
+class StreamManager:
+    """In-process registry of live stream sessions with idle expiry."""
+
+    def __init__(self, max_per_user: int = 1, idle_timeout: float = 60.0):
+        self.max_per_user = max_per_user
+        self.idle_timeout = idle_timeout
+        self._sessions: dict[str, StreamSession] = {}
+        self._lock = threading.Lock()
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for sid in [
+            sid for sid, session in self._sessions.items()
+            if now - session.last_seen > self.idle_timeout
+        ]:
+            del self._sessions[sid]
+
+    def create(self, user_id: int, tier: str, update_every: int) -> StreamSession:
+        """
+        Open a stream for ``user_id``.
+
+        Raises:
+            RuntimeError: If the user already has ``max_per_user`` open streams.
+        """
+        with self._lock:
+            self._expire()
+            open_streams = sum(1 for s in self._sessions.values() if s.user_id == user_id)
+            if open_streams >= self.max_per_user:
+                raise RuntimeError(f"Too many open streams (limit {self.max_per_user})")
+
+            session = StreamSession(user_id, tier, update_every)
+            self._sessions[session.id] = session
+            return session
+
+    def get(self, session_id: str, user_id: int) -> Optional[StreamSession]:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None or session.user_id != user_id:
+                return None
+            return session
+
+    def close(self, session_id: str, user_id: int) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.user_id != user_id:
+                return False
+            del self._sessions[session_id]
+            return True
@@ -0,0 +1,55 @@
+"""
+Service Telemetry
+
+Lets the inference code report stage durations and model statistics
+without depending on the Flask app:
+
+- ``stage_span(name)`` times a block and hands the duration to the stage
+  recorder installed by the app (``timing.StageTimer``, which adds it to
+  the request's Server-Timing header and stage histogram). Without a
+  recorder, e.g. in CLI commands, it only costs a timer call.
+- The Prometheus metrics observed here are collected with the app's and
+  exported at /metrics.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from prometheus_client import Histogram
+
+BATCH_FRAMES = Histogram(
+    "ocean_backbone_batch_frames",
+    "Frames per backbone call.",
+    buckets=(1, 5, 10, 20, 40, 80, 160, 320, 640),
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "ocean_model_load_seconds",
+    "Time to load a model tier.",
+    ["tier"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 40, 80, 160),
+)
+
+_recorder: Optional[Callable[[str, float], None]] = None
+
+
+def set_stage_recorder(recorder: Optional[Callable[[str, float], None]]) -> None:
+    """Install ``recorder(name, seconds)`` for stage durations (None = drop them)."""
+    global _recorder
+    _recorder = recorder
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Report ``seconds`` spent in stage ``name``."""
+    if _recorder is not None:
+        _recorder(name, seconds)
+
+
+@contextmanager
+def stage_span(name: str) -> Iterator[None]:
+    """Time a ``with`` block as stage ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
@@ -0,0 +1,211 @@
+"""
+Inference Autotuning
+
+Benchmarks the backbone execution options on the current host for the
+serving input shape and picks the fastest that keeps embeddings intact:
+
+- backend: eager PyTorch, ``torch.compile``, ONNX Runtime or int8 dynamic
+  quantization of the Linear layers
+- thread count: intra-op threads per worker
+- chunk size: frames per ``torch_forward_frames`` batch
+
+Only the tensor body of the backbone (stem to fc) is swapped. Frame
+preparation stays in PyTorch, and TTA and the flip path are unaffected.
+The result is written as a host profile (see ``host_profile``).
+"""
+
+import io
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("eager", "compiled", "onnx", "int8")
+
+# Backends whose embeddings drift further from eager are not selected
+MIN_COSINE = 0.995
+
+# A faster setting must beat the current one by this fraction to be picked,
+# so noise does not trade away free cores or a simpler backend
+MIN_GAIN = 0.05
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+
+def available_backends(device: torch.device) -> list[str]:
+    """Backends that can run on ``device`` with the installed packages."""
+    backends = ["eager"]
+    if hasattr(torch, "compile"):
+        backends.append("compiled")
+    if device.type == "cpu":
+        try:
+            import onnxruntime  # noqa: F401
+
+            backends.append("onnx")
+        except ImportError:
+            pass
+        backends.append("int8")
+    return backends
+
+
+def _compile_body(apolynet: torch.nn.Module) -> None:
+    apolynet.body = torch.compile(apolynet.body, dynamic=True)
+
+
+def _onnx_body(apolynet: torch.nn.Module) -> None:
+    import onnxruntime as ort
+
+    class Body(torch.nn.Module):
+        def __init__(self, net):
+            super().__init__()
+            self.net = net
+
+        def forward(self, x):
+            return self.net.body(x)["feature"]
+
+    size = apolynet.input_size
+    buffer = io.BytesIO()
+    torch.onnx.export(
+        Body(apolynet),
+        torch.zeros(1, 3, size, size),
+        buffer,
+        input_names=["frames"],
+        output_names=["feature"],
+        dynamic_axes={"frames": {0: "batch"}, "feature": {0: "batch"}},
+    )
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = torch.get_num_threads()
+    session = ort.InferenceSession(
+        buffer.getvalue(), options, providers=["CPUExecutionProvider"]
+    )
+
+    def body(x):
+        out = session.run(None, {"frames": x.detach().cpu().numpy().astype(np.float32)})[0]
+        return {"feature": torch.from_numpy(out)}
+
+    apolynet.body = body
+
+
+def apply_backend(polyface: torch.nn.Module, backend: str) -> None:
+    """
+    Run the body of a PolyFace backbone on ``backend``, in place.
+
+    "int8" changes the weights themselves and is applied while the backbone
+    is built (``predict.create_backbone``); here it is a no-op like "eager".
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Must be one of: {', '.join(BACKENDS)}")
+
+    if backend == "compiled":
+        _compile_body(polyface.backbone)
+    elif backend == "onnx":
+        _onnx_body(polyface.backbone)
+
+
+# =============================================================================
+# Tuning
+# =============================================================================
+
+def _timed(fn, runs: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def _best(timings: dict, baseline) -> object:
+    """Fastest key, unless it is within ``MIN_GAIN`` of ``baseline``."""
+    fastest = min(timings, key=timings.get)
+    if timings[fastest] < timings[baseline] * (1 - MIN_GAIN):
+        return fastest
+    return baseline
+
+
+def tune_host(
+    tier: str,
+    clips: int = 1,
+    runs: int = 5,
+    thread_counts: Optional[list[int]] = None,
+    chunk_sizes: tuple[int, ...] = (8, 16, 32, 64),
+) -> tuple[dict, dict]:
+    """
+    Measure backends, thread counts and chunk sizes for one tier.
+
+    Settings are tuned one at a time: threads on the eager backend, then the
+    backend at those threads, then the chunk size on that backend.
+
+    Args:
+        tier: Model tier whose backbone is measured.
+        clips: 10-frame clips per timed call.
+        runs: Timed calls per setting.
+        thread_counts: Intra-op thread counts to try. Defaults to powers of
+                       two up to the current budget.
+        chunk_sizes: ``torch_forward_frames`` chunk sizes to try.
+
+    Returns:
+        The chosen settings and the measurements, in milliseconds per call.
+    """
+    from .benchmark import random_frames
+    from .predict import FRAME_SIZE, NUM_FRAMES, create_backbone, derive_backbone, embed_frames
+
+    frames = random_frames(clips * NUM_FRAMES, size=FRAME_SIZE) * 255.0
+    budget = torch.get_num_threads()
+    if thread_counts is None:
+        thread_counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n < budget] + [budget]
+
+    eager = create_backbone(tier, backend="eager")
+    reference = embed_frames(frames, eager)
+    results = {"threads": {}, "backends": {}, "chunk_sizes": {}}
+
+    try:
+        for n in thread_counts:
+            torch.set_num_threads(n)
+            results["threads"][n] = _timed(lambda: embed_frames(frames, eager), runs)
+            logger.info(f"threads={n}: {results['threads'][n]:.1f} ms")
+        # Fewest threads within MIN_GAIN of the fastest
+        fastest = min(results["threads"].values())
+        threads = min(n for n in thread_counts if results["threads"][n] <= fastest * (1 + MIN_GAIN))
+        torch.set_num_threads(threads)
+
+        backbones = {"eager": eager}
+        timings = {"eager": results["threads"][threads]}
+        for backend in available_backends(next(eager.parameters()).device)[1:]:
+            try:
+                # Same weights as the reference, so the cosine measures the backend
+                backbone = derive_backbone(eager, backend)
+                cosine = float((embed_frames(frames, backbone) * reference).sum(axis=1).min())
+                ms = _timed(lambda: embed_frames(frames, backbone), runs)
+            except Exception as e:
+                logger.warning(f"Backend '{backend}' unavailable: {e}")
+                results["backends"][backend] = {"error": str(e)}
+                continue
+
+            results["backends"][backend] = {"ms": ms, "min_cosine": cosine}
+            logger.info(f"backend={backend}: {ms:.1f} ms, min cosine {cosine:.4f}")
+            if cosine >= MIN_COSINE:
+                backbones[backend], timings[backend] = backbone, ms
+        results["backends"]["eager"] = {"ms": timings["eager"], "min_cosine": 1.0}
+        backend = _best(timings, "eager")
+
+        backbone = backbones[backend]
+        for size in chunk_sizes:
+            results["chunk_sizes"][size] = _timed(
+                lambda: embed_frames(frames, backbone, chunk_size=size), runs
+            )
+        chunk_size = _best(results["chunk_sizes"], max(chunk_sizes))
+    finally:
+        torch.set_num_threads(budget)
+
+    settings = {"tier": tier, "backend": backend, "chunk_size": chunk_size, "threads": threads}
+    return settings, results
@@ -0,0 +1,139 @@
+import cv2
+import numpy as np
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from .admission import AdmissionRejected, admission
+from .overload import OverloadController, overload
+from .routes import busy_response, resolve_model_tier
+from .services.predict import CONFIGURED_TIERS, FRAME_SIZE
+from .services.streaming import StreamManager
+
+stream_bp = Blueprint("stream", __name__)
+
+streams = StreamManager()
+
+
+@stream_bp.record_once
+def configure_streams(state):
+    streams.max_per_user = state.app.config["STREAM_MAX_PER_USER"]
+    streams.idle_timeout = state.app.config["STREAM_IDLE_TIMEOUT"]
+
+
+@stream_bp.before_request
+def require_single_worker():
+    # Sessions live in this process, so a chunk routed to another worker
+    # would not find its stream
+    if current_app.config["THREAD_WORKERS"] > 1:
+        return jsonify({"error": "Live streams need a single worker process"}), 503
+    return None
+
+
+def decode_frame(data, target_size=(112, 112)):
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+
+    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return cv2.resize(frame, target_size)
+
+
+@stream_bp.route("", methods=["POST"])
+@jwt_required()
+def open_stream():
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+
+    if overload.evaluate() >= OverloadController.REJECT:
+        response = jsonify({"error": "Server is busy, please retry later"})
+        response.headers["Retry-After"] = str(overload.retry_after())
+        return response, 429
+
+    tier = resolve_model_tier(user_id, data.get("tier"))
+    if tier not in CONFIGURED_TIERS:
+        return jsonify(
+            {"error": f"Invalid tier. Must be one of: {', '.join(CONFIGURED_TIERS)}"}
+        ), 400
+
+    update_every = data.get("update_every", current_app.config["STREAM_UPDATE_EVERY"])
+    if isinstance(update_every, bool) or not isinstance(update_every, int) or update_every < 1:
+        return jsonify({"error": "update_every must be a positive integer"}), 400
+
+    try:
+        session = streams.create(user_id, tier, update_every)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 429
+
+    return jsonify(session.state()), 201
+
+
+@stream_bp.route("/<session_id>/frames", methods=["POST"])
+@jwt_required()
+def push_frames(session_id):
+    user_id = int(get_jwt_identity())
+
+    session = streams.get(session_id, user_id)
+    if not session:
+        return jsonify({"error": "Stream not found"}), 404
+
+    # Chunks share the /predict slots and capacity, reserved before the
+    # upload is read
+    try:
+        ticket = admission.reserve(user_id)
+    except AdmissionRejected as e:
+        return busy_response(str(e), e.status, e.retry_after)
+
+    try:
+        return push_chunk(session, ticket)
+    finally:
+        admission.release(ticket)
+
+
+def push_chunk(session, ticket):
+    files = request.files.getlist("frame")
+    if not files:
+        return jsonify({"error": "No frame uploaded"}), 400
+
+    if len(files) > current_app.config["STREAM_MAX_FRAMES_PER_CHUNK"]:
+        return jsonify(
+            {"error": f"At most {current_app.config['STREAM_MAX_FRAMES_PER_CHUNK']} frames per chunk"}
+        ), 400
+
+    frames = [decode_frame(file.read(), FRAME_SIZE) for file in files]
+    if any(frame is None for frame in frames):
+        return jsonify({"error": "Could not decode frame"}), 400
+
+    frames = np.array(frames, dtype=np.uint8).astype("float32") / 255.0
+
+    with overload.track():
+        try:
+            # One unit is a 10-frame backbone pass (see admission.estimate_cost)
+            admission.start(ticket, len(frames) / 10)
+        except AdmissionRejected as e:
+            return busy_response(str(e), e.status, e.retry_after)
+
+        try:
+            updated = session.push(frames)
+        except Exception as e:
+            return jsonify({"error": f"Predict failed: {e}"}), 500
+
+    return jsonify({**session.state(), "updated": updated})
+
+
+@stream_bp.route("/<session_id>", methods=["GET"])
+@jwt_required()
+def get_stream(session_id):
+    session = streams.get(session_id, int(get_jwt_identity()))
+    if not session:
+        return jsonify({"error": "Stream not found"}), 404
+
+    return jsonify(session.state())
+
+
+@stream_bp.route("/<session_id>", methods=["DELETE"])
+@jwt_required()
+def close_stream(session_id):
+    if not streams.close(session_id, int(get_jwt_identity())):
+        return jsonify({"error": "Stream not found"}), 404
+
+    return jsonify({"message": "Stream closed"})
@@ -0,0 +1,166 @@
+"""
+CPU thread budget.
+
+Torch's intra-op pool, TensorFlow's inter/intra-op pools, OpenCV and the BLAS
+libraries (OpenMP, MKL, OpenBLAS) each size themselves to the whole machine
+by default. With several workers, or several requests in one worker, they
+oversubscribe the cores and every request gets slower.
+
+The budget divides the usable cores between the worker processes once at
+startup and applies the same per-worker limit to every library. It must run
+before Torch, TensorFlow or NumPy start their thread pools: the BLAS
+variables are only read when a library loads, and TensorFlow refuses thread
+changes once its runtime is initialized.
+"""
+
+import logging
+import os
+
+from flask import Flask
+
+from .services.host_profile import load_profile
+
+logger = logging.getLogger(__name__)
+
+# Read by OpenMP, MKL and OpenBLAS (NumPy, Torch and TensorFlow kernels) at load time
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def usable_cores() -> int:
+    """
+    Cores this process may run on.
+
+    Honours CPU affinity (taskset, cpusets) and a cgroup v2 CPU quota
+    (``docker --cpus``), both of which ``os.cpu_count()`` ignores.
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+class ThreadBudget:
+
+    def __init__(self):
+        self.cores = 1
+        self.workers = 1
+        self.intra_op = 1
+        self.inter_op = 1
+        self.applied: dict[str, bool] = {}
+
+    def init_app(self, app: Flask) -> None:
+        self.configure(
+            workers=app.config["THREAD_WORKERS"],
+            intra_op=app.config["THREADS_PER_WORKER"],
+            inter_op=app.config["THREAD_INTEROP"],
+            tuned=load_profile().get("threads", 0),
+        )
+        self.apply()
+
+    def configure(
+        self, workers: int = 1, intra_op: int = 0, inter_op: int = 1, tuned: int = 0
+    ) -> None:
+        """
+        Size the per-worker budget.
+
+        Args:
+            workers: Worker processes sharing the machine.
+            intra_op: Threads per operation in each worker (0 = cores / workers).
+            inter_op: Operations run in parallel in each worker.
+            tuned: Thread count from the host profile, used instead of
+                   cores / workers when it is lower and ``intra_op`` is 0.
+        """
+        self.cores = usable_cores()
+        self.workers = max(1, workers)
+        split = max(1, self.cores // self.workers)
+        if intra_op > 0:
+            self.intra_op = intra_op
+        else:
+            self.intra_op = min(tuned, split) if tuned > 0 else split
+        self.inter_op = max(1, inter_op)
+
+        if self.workers * self.intra_op > self.cores:
+            logger.warning(
+                f"Thread budget oversubscribed: {self.workers} workers x "
+                f"{self.intra_op} threads on {self.cores} cores"
+            )
+
+    def apply(self) -> dict:
+        """
+        Apply the budget to the BLAS env vars, Torch, TensorFlow and OpenCV.
+
+        A library that already started its pools keeps them; that is logged
+        and reported in ``effective()`` instead of failing startup.
+
+        Returns:
+            The effective settings.
+        """
+        for name in BLAS_ENV_VARS:
+            os.environ[name] = str(self.intra_op)
+        self.applied = {"env": True}
+
+        import cv2
+        import tensorflow as tf
+        import torch
+
+        torch.set_num_threads(self.intra_op)
+        try:
+            torch.set_num_interop_threads(self.inter_op)
+            self.applied["torch"] = True
+        except RuntimeError:
+            self.applied["torch"] = torch.get_num_interop_threads() == self.inter_op
+
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(self.intra_op)
+            tf.config.threading.set_inter_op_parallelism_threads(self.inter_op)
+            self.applied["tensorflow"] = True
+        except RuntimeError:
+            self.applied["tensorflow"] = False
+
+        cv2.setNumThreads(self.intra_op)
+        self.applied["opencv"] = True
+
+        for library, ok in self.applied.items():
+            if not ok:
+                logger.warning(
+                    f"{library} was initialized before the thread budget; limits not applied"
+                )
+
+        settings = self.effective()
+        logger.info(f"Thread budget: {settings}")
+        return settings
+
+    def effective(self) -> dict:
+        """Thread settings each library actually runs with."""
+        import cv2
+        import tensorflow as tf
+        import torch
+
+        return {
+            "cores": self.cores,
+            "workers": self.workers,
+            "budget": {"intra_op": self.intra_op, "inter_op": self.inter_op},
+            "torch": {
+                "intra_op": torch.get_num_threads(),
+                "inter_op": torch.get_num_interop_threads(),
+            },
+            "tensorflow": {
+                "intra_op": tf.config.threading.get_intra_op_parallelism_threads(),
+                "inter_op": tf.config.threading.get_inter_op_parallelism_threads(),
+            },
+            "opencv": cv2.getNumThreads(),
+            "env": {name: os.environ.get(name) for name in BLAS_ENV_VARS},
+            "applied": dict(self.applied),
+        }
+
+
+thread_budget = ThreadBudget()
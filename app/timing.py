@@ -0,0 +1,102 @@
+"""
+Stage timing for requests.
+
+Code on the request path wraps its stages in ``stage_timer.span(name)`` (or
+reports a measured duration with ``record``). The inference services do not
+depend on Flask and use ``services.telemetry.stage_span``, which is routed
+here. Durations of the same stage add up within a request, e.g. per-frame
+decode time. When the request ends they are:
+
+- returned in a ``Server-Timing`` header, so browser dev tools and clients
+  see where the time of one request went
+- observed into the Prometheus stage histogram (``metrics.STAGE_SECONDS``),
+  served by /metrics and summarized by /admin/metrics
+
+Outside a request (CLI, benchmarks) spans cost a timer call and record
+nothing.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from flask import Flask, g, has_request_context
+
+from .metrics import STAGE_SECONDS, collector_registry
+from .services.telemetry import set_stage_recorder
+
+
+class StageTimer:
+
+    def __init__(self):
+        self.server_timing = True
+
+    def init_app(self, app: Flask) -> None:
+        self.server_timing = app.config["SERVER_TIMING"]
+        set_stage_recorder(self.record)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add ``seconds`` to stage ``name`` of the current request."""
+        if not has_request_context():
+            return
+        timings = g.setdefault("stage_timings", {})
+        timings[name] = timings.get(name, 0.0) + seconds * 1000
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a ``with`` block as stage ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timings(self) -> dict[str, float]:
+        """Stage durations of the current request so far, in milliseconds."""
+        return dict(g.get("stage_timings", {})) if has_request_context() else {}
+
+    def _start(self) -> None:
+        g.request_started = time.perf_counter()
+
+    def _finish(self, response):
+        timings = g.get("stage_timings")
+        if not timings:
+            return response
+
+        for name, ms in timings.items():
+            STAGE_SECONDS.labels(name).observe(ms / 1000)
+
+        if self.server_timing:
+            total = (time.perf_counter() - g.request_started) * 1000
+            metrics = [f"{name};dur={ms:.1f}" for name, ms in timings.items()]
+            response.headers["Server-Timing"] = ", ".join(metrics + [f"total;dur={total:.1f}"])
+        return response
+
+    def stats(self) -> dict[str, dict]:
+        """Per-stage histograms of all workers, with cumulative bucket counts in ms."""
+        stats = {}
+        for family in collector_registry().collect():
+            if family.name != "ocean_request_stage_duration_seconds":
+                continue
+            for sample in family.samples:
+                stage = stats.setdefault(
+                    sample.labels["stage"], {"count": 0, "sum_ms": 0.0, "buckets": {}}
+                )
+                if sample.name.endswith("_count"):
+                    stage["count"] = int(sample.value)
+                elif sample.name.endswith("_sum"):
+                    stage["sum_ms"] = round(sample.value * 1000, 3)
+                elif sample.name.endswith("_bucket"):
+                    le = sample.labels["le"]
+                    bound = le if le == "+Inf" else f"{float(le) * 1000:g}"
+                    stage["buckets"][bound] = int(sample.value)
+
+        for stage in stats.values():
+            count = stage["count"]
+            stage["mean_ms"] = round(stage["sum_ms"] / count, 3) if count else None
+        return stats
+
+
+stage_timer = StageTimer()